@@ -0,0 +1,87 @@
+import sqlite3
+from functools import lru_cache
+
+
+class CurrencyRates:
+    """Класс для перевода окладов в рубли по курсу месяца публикации. Котировки загружаются один раз, а курсы
+        запрашиваются через LRU-кэш по паре (код валюты, месяц), поэтому перевод стоит как поиск в словаре
+
+    Attributes:
+        fallback_rates (dict[str: float]): Курсы валют на случай, если котировки за месяц нет
+        quotes (dict[str: dict[str: float | None]]): Котировки валют по месяцам в формате ГГГГ-ММ
+        cache_size (int): Максимальное количество курсов в кэше
+    """
+    fallback_rates = {"AZN": 35.68, "BYR": 23.91, "EUR": 59.90, "GEL": 21.74, "KGS": 0.76,
+                      "KZT": 0.13, "RUR": 1, "UAH": 1.64, "USD": 60.66, "UZS": 0.0055}
+
+    def __init__(self, quotes=None, cache_size=4096):
+        """Инициализация объекта CurrencyRates
+
+        Args:
+            quotes (dict[str: dict[str: float | None]] | None): Котировки валют по месяцам, None - только
+                fallback_rates
+            cache_size (int): Максимальное количество курсов в кэше
+        """
+        self.quotes = quotes if quotes is not None else {}
+        self.cache_size = cache_size
+        self.get_rate = lru_cache(maxsize=cache_size)(self._find_rate)
+
+    def __reduce__(self):
+        """Передача объекта в другой процесс без кэша, который там собирается заново
+
+        Returns:
+            tuple: Класс и аргументы для его создания
+        """
+        return CurrencyRates, (self.quotes, self.cache_size)
+
+    @classmethod
+    def from_db(cls, db_path, cache_size=4096):
+        """Загрузка котировок из таблицы quotes db файла. Файл открывается только для чтения; если файла или
+            таблицы нет, используются только fallback_rates
+
+        Args:
+            db_path (str): Путь к db файлу
+            cache_size (int): Максимальное количество курсов в кэше
+
+        Returns:
+            CurrencyRates: Объект с загруженными котировками
+        """
+        try:
+            db_connect = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        except sqlite3.OperationalError:
+            return cls(cache_size=cache_size)
+        try:
+            db_cursor = db_connect.execute("SELECT * FROM quotes;")
+            currencies = [column[0] for column in db_cursor.description[1:]]
+            quotes = {row[0]: dict(zip(currencies, row[1:])) for row in db_cursor.fetchall()}
+        except sqlite3.OperationalError:
+            quotes = None
+        finally:
+            db_connect.close()
+        return cls(quotes, cache_size)
+
+    def _find_rate(self, currency, month):
+        """Поиск курса валюты за месяц: котировка месяца или, если её нет, курс из fallback_rates
+
+        Args:
+            currency (str): Код валюты
+            month (str | None): Месяц в формате ГГГГ-ММ
+
+        Returns:
+            float: Стоимость единицы валюты в рублях
+        """
+        quote = self.quotes.get(month, {}).get(currency)
+        return float(quote if quote is not None else self.fallback_rates[currency])
+
+
+@lru_cache(maxsize=None)
+def get_currency_rates(db_path='vacancies.db'):
+    """Получение общего для процесса объекта CurrencyRates для db файла; котировки загружаются при первом вызове
+
+    Args:
+        db_path (str): Путь к db файлу
+
+    Returns:
+        CurrencyRates: Курсы валют
+    """
+    return CurrencyRates.from_db(db_path)
@@ -0,0 +1,44 @@
+import os
+import pickle
+import sqlite3
+import tempfile
+import unittest
+from currency_rates import CurrencyRates
+
+
+class CurrencyRatesTests(unittest.TestCase):
+    def setUp(self):
+        (handle, self.db_path) = tempfile.mkstemp(suffix='.db')
+        os.close(handle)
+        db_connect = sqlite3.connect(self.db_path)
+        db_connect.execute("CREATE TABLE quotes(\ndate TEXT PRIMARY KEY,\nUSD REAL,\nRUR REAL,\nEUR REAL);")
+        db_connect.executemany("INSERT INTO quotes\nVALUES(?, ?, ?, ?);",
+                               [("2003-01", 31.5, 1, None), ("2004-02", 29.0, 1, 35.25)])
+        db_connect.commit()
+        db_connect.close()
+
+    def tearDown(self):
+        os.remove(self.db_path)
+
+    def test_month_quote(self):
+        currency_rates = CurrencyRates.from_db(self.db_path)
+        self.assertEqual(currency_rates.get_rate("USD", "2003-01"), 31.5)
+        self.assertEqual(currency_rates.get_rate("EUR", "2004-02"), 35.25)
+
+    def test_fallback_rate(self):
+        currency_rates = CurrencyRates.from_db(self.db_path)
+        self.assertEqual(currency_rates.get_rate("EUR", "2003-01"), 59.90)
+        self.assertEqual(currency_rates.get_rate("USD", "2010-05"), 60.66)
+        self.assertEqual(currency_rates.get_rate("KZT", None), 0.13)
+
+    def test_missing_db(self):
+        currency_rates = CurrencyRates.from_db(os.path.join(tempfile.gettempdir(), "no_such_currency_rates.db"))
+        self.assertEqual(currency_rates.get_rate("USD", "2003-01"), 60.66)
+
+    def test_pickle(self):
+        currency_rates = pickle.loads(pickle.dumps(CurrencyRates.from_db(self.db_path)))
+        self.assertEqual(currency_rates.get_rate("USD", "2003-01"), 31.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,22 +1,28 @@
 # from vacancies import get_vacancies
 # from statistics import CurrencyApiConnect
-from statistics import get_statistics
+import sys
+from statistics import get_statistics, update_statistics
 from statistics import CurrencyApiConnect
 
-def main_function():
+def main_function(verbose=False):
     """Выбор типа анализа данных из csv-файла
 
+    Args:
+        verbose (bool): Печатать ли скорость загрузки csv файла в db файл
     """
     main_input_request = "Выберите тип вывода: "
     # main_input_info = input(main_input_request)
     main_input_info = "Статистика"
-    if main_input_info != "Вакансии" and main_input_info != "Статистика":
+    if main_input_info != "Вакансии" and main_input_info != "Статистика" and main_input_info != "Обновление":
         print("Введён неправильный тип вывода")
         return
     # if main_input_info == "Вакансии":
     #     get_vacancies()
     # else:
-    get_statistics()
+    if main_input_info == "Обновление":
+        update_statistics()
+    else:
+        get_statistics(verbose=verbose)
 
 def test():
     db = CurrencyApiConnect('currency_quotes.db')
@@ -27,7 +33,7 @@ def test():
     print(cur_quotes)
 
 if __name__ == '__main__':
-    main_function()
+    main_function('--verbose' in sys.argv)
     # test()
 
 
@@ -1,63 +1,125 @@
 import operator
 import multiprocessing
 import time
+import threading
+import traceback
 import pdfkit
 import requests
+from requests.adapters import HTTPAdapter
 import csv
-import json
+import io
+import re
+import mmap
 import sqlite3
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
+import hashlib
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 import xml.etree.ElementTree as ET
 from glob import glob
-from os import listdir, stat, remove
-from os.path import isfile, join
+from collections import namedtuple
+from os import stat, remove, replace, truncate, makedirs, getpid
+from os.path import isfile
+from sys import intern
 from functools import reduce, cmp_to_key
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
 from openpyxl import Workbook
 from openpyxl.styles import Font, Border, Side
 from jinja2 import Environment, FileSystemLoader
-from locale import atof, setlocale, LC_NUMERIC
+from currency_rates import CurrencyRates
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:
+    pa = feather = None
 
 
-class Vacancy:
-    """Класс для представления вакансии
+VacancyRow = namedtuple('VacancyRow', ['name', 'salary', 'area_name', 'published_at'])
+VacancyRow.__doc__ = """Строка таблицы вакансий года, готовая для составления статистики
 
     Attributes:
         name (str): Название вакансии
-        description (str):  Описание вакансии
-        key_skills (list[str]): Необходимые скиллы для вакансии
-        experience_id (str): Необходимый опыт для вакансии
-        premium (str): Является ли вакансия премиумной
-        employer_name (str): Название компании
-        salary (str | float): Величина оклада
+        salary (float): Величина оклада в рублях
         area_name (str): Название города
-        published_at (str): Время публикации вакансии
+        published_at (str): Год публикации вакансии
     """
-    def __init__(self, name, description, key_skills, experience_id, premium,
-                 employer_name, salary, area_name, published_at):
-        """Инициализирует объект Vacancy
-
-        Args:
-            name (str):
-            description (str | None):
-            key_skills (list[str] | None):
-            experience_id (str | None):
-            premium (str | None):
-            employer_name (str | None):
-            salary (str | float):
-            area_name (str):
-            published_at (str):
-        """
-        self.name = name
-        self.description = description
-        self.key_skills = key_skills
-        self.experience_id = experience_id
-        self.premium = premium
-        self.employer_name = employer_name
-        self.salary = salary
-        self.area_name = area_name
-        self.published_at = published_at
+
+
+class Aggregate:
+    """Класс для представления объединяемой статистики по одному ключу: суммы, количества, минимума, максимума и
+        суммы квадратов значений. Результаты для любых частей данных объединяются методом merge
+
+    Attributes:
+        sum (float): Сумма значений
+        count (int): Количество значений
+        min (float): Минимальное значение
+        max (float): Максимальное значение
+        sum_sq (float): Сумма квадратов значений
+    """
+    __slots__ = ('sum', 'count', 'min', 'max', 'sum_sq')
+
+    def __init__(self, sum=0.0, count=0, min=float('inf'), max=float('-inf'), sum_sq=0.0):
+        """Инициализирует объект Aggregate
+
+        Args:
+            sum (float): Сумма значений
+            count (int): Количество значений
+            min (float): Минимальное значение
+            max (float): Максимальное значение
+            sum_sq (float): Сумма квадратов значений
+        """
+        self.sum = sum
+        self.count = count
+        self.min = min
+        self.max = max
+        self.sum_sq = sum_sq
+
+    def add(self, value):
+        """Учёт одного значения
+
+        Args:
+            value (float): Значение
+        """
+        self.sum += value
+        self.count += 1
+        self.sum_sq += value * value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other):
+        """Добавление к статистике другой статистики по тому же ключу
+
+        Args:
+            other (Aggregate): Статистика для добавления
+
+        Returns:
+            Aggregate: Этот же объект
+        """
+        self.sum += other.sum
+        self.count += other.count
+        self.sum_sq += other.sum_sq
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def mean(self):
+        """Среднее значение, обрезанное до целого, или 0, если значений нет
+
+        Returns:
+            int: Среднее значение
+        """
+        return int(self.sum / self.count) if self.count != 0 else int(self.sum)
+
+    def __eq__(self, other):
+        return isinstance(other, Aggregate) and all(getattr(self, attr) == getattr(other, attr)
+                                                    for attr in self.__slots__)
+
+    def __repr__(self):
+        return f"Aggregate(sum={self.sum}, count={self.count}, min={self.min}, max={self.max}, sum_sq={self.sum_sq})"
 
 
 # class Salary:
@@ -113,40 +175,85 @@ class CurrencyApiConnect:
         db_connect (sqlite3.connect): Объект управления базой данных
         db_cursor (sqlite3.connect): Объект управления базой данных
     """
-    def __init__(self, db_connect):
+    def __init__(self, db_connect, url="http://www.cbr.ru/scripts/XML_daily.asp", max_workers=8, retries=3,
+                 backoff=0.5):
         """Инициализация объекта CurrencyApiConnect
 
         Args:
             connect (sqlite3.connect): Коннектор к базе данных
+            url (str): Адрес api котировок в формате XML_daily.asp
+            max_workers (int): Максимальное количество одновременных запросов
+            retries (int): Количество повторов неудавшегося запроса
+            backoff (float): Пауза перед первым повтором в секундах, для каждого следующего удваивается
         """
         self.db_connect = db_connect
         self.db_cursor = self.db_connect.cursor()
+        self.url = url
+        self.max_workers = max_workers
+        self.retries = retries
+        self.backoff = backoff
 
     def get_currency_quotes(self, year_borders):
-        """Получение обозначений валют и соответствующих им значений котировок по диапазону годов
+        """Получение обозначений валют и соответствующих им значений котировок по диапазону годов. Таблица quotes
+            служит кэшем: запрашиваются только месяцы, которых в ней ещё нет, и последний записанный месяц.
+            Месяцы после текущего не запрашиваются
 
         Args:
             year_borders (tuple[str, str]): Границы временного периода, с которого нужно получить котировки.
 
         Returns:
-            dict[str: dict[str: float]]: Месяц и соответствующие котировки валют по месяцам
+            dict[str: dict[str: float]]: Месяц и соответствующие котировки валют по месяцам, которых не было в кэше
         """
-        setlocale(LC_NUMERIC, 'French_Canada.1252')
-        quotes_for_months = {}
-        for year in range(int(year_borders[0]), int(year_borders[1]) + 1):
-            for month in range(1, 13):
-                month = format(month, '02d')
-                req = requests.get(f"http://www.cbr.ru/scripts/XML_daily.asp?date_req=01/{month}/{year}")
-                root_node = ET.ElementTree(ET.fromstring(req.text)).getroot()
-                quotes = {tag.find('CharCode').text: atof(tag.find('Value').text) / atof(tag.find('Nominal').text)
-                          for tag in root_node.findall('Valute')}
-                quotes_for_months[f"{year}-{month}"] = quotes
+        cached_months = self._get_cached_months()
+        current_month = datetime.now().strftime('%Y-%m')
+        months = [f"{year}-{format(month, '02d')}" for year in range(int(year_borders[0]), int(year_borders[1]) + 1)
+                  for month in range(1, 13) if f"{year}-{format(month, '02d')}" <= current_month]
+        high_water_mark = self._get_high_water_mark()
+        missing_months = [month for month in months if month not in cached_months or month == high_water_mark]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return dict(zip(missing_months, executor.map(self._get_month_quotes, missing_months)))
+
+    def _get_cached_months(self):
+        """Получение месяцев, котировки за которые уже есть в таблице quotes
+
+        Returns:
+            set[str]: Месяцы в формате ГГГГ-ММ
+        """
+        self.db_cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'quotes';")
+        if self.db_cursor.fetchone() is None:
+            return set()
+        self.db_cursor.execute("SELECT date FROM quotes;")
+        return {row[0] for row in self.db_cursor.fetchall()}
+
+    def _get_month_quotes(self, month):
+        """Получение котировок валют на первое число месяца с повтором неудавшихся запросов
+
+        Args:
+            month (str): Месяц в формате ГГГГ-ММ
+
+        Returns:
+            dict[str: float]: Котировки валют
+        """
+        (year, month) = month.split('-')
+        for attempt in range(self.retries + 1):
+            try:
+                req = requests.get(f"{self.url}?date_req=01/{month}/{year}", timeout=30)
+                req.raise_for_status()
+                root_node = ET.fromstring(req.content)
                 req.close()
-                time.sleep(0.03)
-        return quotes_for_months
+                break
+            except (requests.RequestException, ET.ParseError):
+                if attempt == self.retries:
+                    raise
+                time.sleep(self.backoff * 2 ** attempt)
+        return {tag.find('CharCode').text: float(tag.find('Value').text.replace(',', '.'))
+                                           / float(tag.find('Nominal').text.replace(',', '.'))
+                for tag in root_node.findall('Valute')}
 
     def save_currency_quotes_in_db(self, quotes_for_months, currencies):
-        """Запись котировок валют в db файл
+        """Запись котировок валют в db файл одной транзакцией. Новые месяцы добавляются, изменившиеся обновляются,
+            остальные не трогаются; самый поздний месяц, за который есть котировки, сохраняется как отметка
+            high_water_mark
 
         Args:
             quotes_for_months (list[tuple[str, dict[str: float]]]): Котировки валют по месяцам
@@ -176,16 +283,35 @@ class CurrencyApiConnect:
             return query
 
         query = db_query_join("CREATE TABLE IF NOT EXISTS quotes(\ndate TEXT PRIMARY KEY,\n", ' REAL', ',\n', currencies)
-        self.db_cursor.execute(query)
-        self.db_connect.commit()
-        query = db_query_join("INSERT INTO quotes\nVALUES(?, ", '', ', ', ['?' for _ in currencies])
-        for (date, quotes_for_month) in quotes_for_months.items():
-            quotes = tuple([date])
-            quotes += tuple(list(map(lambda currency: quotes_for_month.get(currency, None)
-                                                      if currency != 'RUR' else 1, currencies)))
-            self.db_cursor.execute(query, quotes)
-        self.db_connect.commit()
+        upsert_query = db_query_join("INSERT INTO quotes\nVALUES(?, ", '', ', ', ['?' for _ in currencies])[:-1] \
+            + "\nON CONFLICT(date) DO UPDATE SET " \
+            + ', '.join(f"{currency} = excluded.{currency}" for currency in currencies) \
+            + "\nWHERE " + ' OR '.join(f"quotes.{currency} IS NOT excluded.{currency}" for currency in currencies) + ';'
+        with self.db_connect:
+            self.db_cursor.execute(query)
+            self.db_cursor.execute("CREATE TABLE IF NOT EXISTS meta(\nkey TEXT PRIMARY KEY,\nvalue TEXT);")
+            self.db_cursor.executemany(upsert_query, ((date, *map(lambda currency: quotes_for_month.get(currency, None)
+                                                                  if currency != 'RUR' else 1, currencies))
+                                                      for (date, quotes_for_month) in quotes_for_months.items()))
+            high_water_mark = max((date for (date, quotes_for_month) in quotes_for_months.items()
+                                   if len(quotes_for_month) != 0), default=None)
+            if high_water_mark is not None:
+                self.db_cursor.execute("INSERT INTO meta\nVALUES('quotes_high_water_mark', ?)\n"
+                                       "ON CONFLICT(key) DO UPDATE SET value = max(value, excluded.value);",
+                                       (high_water_mark,))
+
+    def _get_high_water_mark(self):
+        """Получение самого позднего месяца, котировки за который записаны в таблицу quotes
 
+        Returns:
+            str | None: Месяц в формате ГГГГ-ММ
+        """
+        self.db_cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'meta';")
+        if self.db_cursor.fetchone() is None:
+            return None
+        self.db_cursor.execute("SELECT value FROM meta WHERE key = 'quotes_high_water_mark';")
+        row = self.db_cursor.fetchone()
+        return row[0] if row is not None else None
 
     def read_currency_quotes_from_db(self, currencies):
         """Чтение котировок валют из db файла
@@ -205,105 +331,574 @@ class CurrencyApiConnect:
         return quotes_for_years
 
 
+class TokenBucket:
+    """Класс для ограничения частоты запросов: каждый запрос забирает из корзины один токен, а токены пополняются с
+        постоянной скоростью. Корзина общая для всех потоков
+
+    Attributes:
+        rate (float): Скорость пополнения, токенов в секунду
+        capacity (float): Максимальное количество токенов
+        tokens (float): Текущее количество токенов
+        updated_at (float): Время последнего пополнения
+        lock (threading.Lock): Блокировка для доступа из нескольких потоков
+    """
+    def __init__(self, rate, capacity=None):
+        """Инициализация объекта TokenBucket
+
+        Args:
+            rate (float): Скорость пополнения, токенов в секунду
+            capacity (float | None): Максимальное количество токенов, по умолчанию равно rate
+        """
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Получение одного токена; если токенов нет, поток ждёт их пополнения
+
+        """
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
 class HHruApiConnect:
     """Класс для получения данных из внешнего api hhru и формировании по ним файлов
 
+    Attributes:
+        url (str): Адрес метода vacancies api hhru
+        max_workers (int): Максимальное количество одновременных запросов
+        per_page (int): Количество вакансий на странице
+        results_cap (int): Сколько вакансий api отдаёт по одному запросу, с учётом всех страниц
+        retries (int): Количество повторов неудавшегося запроса
+        backoff (float): Пауза перед первым повтором в секундах, для каждого следующего удваивается
+        rate_limiter (TokenBucket): Ограничитель частоты запросов
+        session (requests.Session): Сессия с пулом соединений, общая для всех потоков
+        db_connect (sqlite3.connect | None): Коннектор к базе данных для контрольных точек загрузки
     """
-    def save_vacancy_data_for_past_day(self):
+    def __init__(self, url='https://api.hh.ru/vacancies', max_workers=8, rate=10, per_page=100, results_cap=2000,
+                 retries=3, backoff=0.5, db_connect=None):
+        """Инициализация объекта HHruApiConnect
+
+        Args:
+            url (str): Адрес метода vacancies api hhru
+            max_workers (int): Максимальное количество одновременных запросов
+            rate (float): Максимальное количество запросов в секунду
+            per_page (int): Количество вакансий на странице
+            results_cap (int): Сколько вакансий api отдаёт по одному запросу, с учётом всех страниц
+            retries (int): Количество повторов неудавшегося запроса
+            backoff (float): Пауза перед первым повтором в секундах, для каждого следующего удваивается
+            db_connect (sqlite3.connect | None): Коннектор к базе данных для контрольных точек загрузки
+        """
+        self.url = url
+        self.max_workers = max_workers
+        self.per_page = per_page
+        self.results_cap = results_cap
+        self.retries = retries
+        self.backoff = backoff
+        self.rate_limiter = TokenBucket(rate)
+        self.session = requests.Session()
+        self.session.mount(url, HTTPAdapter(pool_connections=1, pool_maxsize=max_workers))
+        self.db_connect = db_connect
+
+    def save_vacancy_data_for_past_day(self, file_path="vacancies_for_past_day.csv"):
         """Получение и сохранение данных о вакансиях за предыдущий день
 
+        Args:
+            file_path (str): Путь к csv файлу для записи
         """
-        yesterday = time.strftime('%Y-%m-%d' , time.gmtime( time.time() - 86400 ))
-        with open("vacancies_for_past_day.csv", mode="w", encoding='utf-8') as file:
-            fileWriter = csv.writer(file, delimiter=",", lineterminator="\r")
-            fileWriter.writerow(['name', 'salary_from', 'salary_to', 'salary_currency', 'area_name', 'published_at'])
-            for time_from, time_to in (('00:00:00', '10:00:00'), ('10:00:00', '13:00:00'),
-                                       ('13:00:00', '16:00:00'), ('16:00:00', '23:59:59')):
-                for page in range(20):
-                    vacancy_data = json.loads(self._get_vacancy_data_from_HHru(yesterday, time_from, time_to, page))
-                    for item in vacancy_data['items']:
-                        fileWriter.writerow([item['name'], item['salary']['from'], item['salary']['to'],
-                                            item['salary']['currency'], item['area']['name'], item['published_at']])
-                    time.sleep(0.05)
+        yesterday = datetime.strptime(time.strftime('%Y-%m-%d', time.gmtime(time.time() - 86400)), '%Y-%m-%d')
+        self.save_vacancy_data(yesterday, yesterday + timedelta(hours=23, minutes=59, seconds=59), file_path)
 
-    def _get_vacancy_data_from_HHru(self, date, time_from, time_to, page):
-        """Получение данных о вакансиях за определённый промежуток времени
+    def save_vacancy_data(self, date_from, date_to, file_path):
+        """Получение данных о вакансиях за промежуток времени и запись их в csv файл по мере получения.
+            Страницы запрашиваются параллельно. Если в промежутке больше вакансий, чем api отдаёт по одному
+            запросу, он делится пополам, пока вакансии не поместятся. Вакансии, попавшие на границу двух
+            промежутков, записываются один раз. Если задан db_connect, после каждой страницы сохраняется
+            контрольная точка, и прерванная загрузка того же промежутка продолжается с места остановки
 
         Args:
-            date (str): Дата
-            time_from (str): Время, с которого начать брать данные
-            time_to (str): Время, заканчивая которым брать данные
+            date_from (datetime): Начало промежутка
+            date_to (datetime): Конец промежутка
+            file_path (str): Путь к csv файлу для записи
+        """
+        def write_items(vacancy_data):
+            """Запись в файл вакансий страницы, которые ещё не были записаны
+
+            Args:
+                vacancy_data (dict): Страница ответа api
+
+            Returns:
+                list[str]: id записанных вакансий
+            """
+            new_ids = []
+            for item in vacancy_data['items']:
+                if item['id'] in written_ids:
+                    continue
+                written_ids.add(item['id'])
+                new_ids.append(item['id'])
+                file_writer.writerow([item['name'], item['salary']['from'], item['salary']['to'],
+                                      item['salary']['currency'], item['area']['name'], item['published_at']])
+            return new_ids
+
+        def complete_page(window, page, vacancy_data, write=True):
+            """Запись вакансий страницы и сохранение контрольной точки
+
+            Args:
+                window (tuple[datetime, datetime]): Промежуток времени
+                page (int): Страница данных
+                vacancy_data (dict): Страница ответа api
+                write (bool): Записывать ли вакансии страницы в файл
+            """
+            new_ids = write_items(vacancy_data) if write else []
+            if self.db_connect is not None:
+                file.flush()
+                self._save_checkpoint(file_path, window, page, vacancy_data, new_ids, file.tell())
+
+        (done_pages, written_ids, size) = self._read_checkpoint(file_path, date_from, date_to)
+        if size is not None:
+            truncate(file_path, size)
+        with open(file_path, mode="a" if size is not None else "w", encoding='utf-8') as file, \
+                ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            file_writer = csv.writer(file, delimiter=",", lineterminator="\r")
+            if size is None:
+                file_writer.writerow(['name', 'salary_from', 'salary_to', 'salary_currency', 'area_name',
+                                      'published_at'])
+            windows = [(date_from, date_to)]
+            pages = []
+            while len(windows) != 0:
+                next_windows = []
+                not_done_windows = [window for window in windows if (*window, 0) not in done_pages]
+                fetched = dict(zip(not_done_windows, executor.map(
+                    lambda window: self._get_vacancy_data_from_HHru(*window, 0), not_done_windows)))
+                for window in windows:
+                    vacancy_data = fetched[window] if window in fetched else done_pages[(*window, 0)]
+                    if vacancy_data['found'] > self.results_cap and window[1] - window[0] > timedelta(seconds=1):
+                        next_windows.extend(self._split_window(*window))
+                        if window in fetched:
+                            complete_page(window, 0, vacancy_data, write=False)
+                        continue
+                    if window in fetched:
+                        complete_page(window, 0, vacancy_data)
+                    pages.extend((window, page) for page in
+                                 range(1, min(vacancy_data['pages'], self.results_cap // self.per_page))
+                                 if (*window, page) not in done_pages)
+                windows = next_windows
+            futures = {executor.submit(self._get_vacancy_data_from_HHru, *window, page): (window, page)
+                       for (window, page) in pages}
+            for future in as_completed(futures):
+                complete_page(*futures[future], future.result())
+
+    def _read_checkpoint(self, file_path, date_from, date_to):
+        """Чтение контрольной точки загрузки промежутка в файл. Если последняя загрузка в этот файл была за другой
+            промежуток или файла нет, контрольная точка сбрасывается
+
+        Args:
+            file_path (str): Путь к csv файлу
+            date_from (datetime): Начало промежутка
+            date_to (datetime): Конец промежутка
+
+        Returns:
+            tuple[dict[tuple[datetime, datetime, int]: dict[str: int]], set[str], int | None]: Загруженные страницы
+                с количеством вакансий и страниц, id записанных вакансий и размер файла на момент контрольной точки
+        """
+        if self.db_connect is None:
+            return {}, set(), None
+        db_cursor = self.db_connect.cursor()
+        with self.db_connect:
+            db_cursor.execute("CREATE TABLE IF NOT EXISTS harvest(\nfile_path TEXT PRIMARY KEY,\ndate_from TEXT,\n"
+                              "date_to TEXT,\nsize INTEGER);")
+            db_cursor.execute("CREATE TABLE IF NOT EXISTS harvest_pages(\nfile_path TEXT,\ndate_from TEXT,\n"
+                              "date_to TEXT,\npage INTEGER,\nfound INTEGER,\npages INTEGER,\n"
+                              "PRIMARY KEY (file_path, date_from, date_to, page));")
+            db_cursor.execute("CREATE TABLE IF NOT EXISTS harvest_ids(\nfile_path TEXT,\nid TEXT,\n"
+                              "PRIMARY KEY (file_path, id)) WITHOUT ROWID;")
+            db_cursor.execute("SELECT date_from, date_to, size FROM harvest WHERE file_path = ?;", (file_path,))
+            row = db_cursor.fetchone()
+            if row is not None and row[:2] == (date_from.isoformat(), date_to.isoformat()) and row[2] is not None \
+                    and isfile(file_path) and stat(file_path).st_size >= row[2]:
+                db_cursor.execute("SELECT date_from, date_to, page, found, pages FROM harvest_pages\n"
+                                  "WHERE file_path = ?;", (file_path,))
+                done_pages = {(datetime.fromisoformat(window_from), datetime.fromisoformat(window_to), page):
+                              {'found': found, 'pages': pages}
+                              for (window_from, window_to, page, found, pages) in db_cursor.fetchall()}
+                db_cursor.execute("SELECT id FROM harvest_ids WHERE file_path = ?;", (file_path,))
+                return done_pages, {id_row[0] for id_row in db_cursor.fetchall()}, row[2]
+            for table in ('harvest', 'harvest_pages', 'harvest_ids'):
+                db_cursor.execute(f"DELETE FROM {table} WHERE file_path = ?;", (file_path,))
+            db_cursor.execute("INSERT INTO harvest\nVALUES(?, ?, ?, NULL);",
+                              (file_path, date_from.isoformat(), date_to.isoformat()))
+        return {}, set(), None
+
+    def _save_checkpoint(self, file_path, window, page, vacancy_data, new_ids, size):
+        """Сохранение контрольной точки одной транзакцией после записи страницы в файл
+
+        Args:
+            file_path (str): Путь к csv файлу
+            window (tuple[datetime, datetime]): Промежуток времени
             page (int): Страница данных
+            vacancy_data (dict): Страница ответа api
+            new_ids (list[str]): id вакансий, записанных со страницы
+            size (int): Размер файла после записи страницы
+        """
+        db_cursor = self.db_connect.cursor()
+        with self.db_connect:
+            db_cursor.execute("INSERT OR REPLACE INTO harvest_pages\nVALUES(?, ?, ?, ?, ?, ?);",
+                              (file_path, window[0].isoformat(), window[1].isoformat(), page, vacancy_data['found'],
+                               vacancy_data['pages']))
+            db_cursor.executemany("INSERT OR IGNORE INTO harvest_ids\nVALUES(?, ?);",
+                                  ((file_path, vacancy_id) for vacancy_id in new_ids))
+            db_cursor.execute("UPDATE harvest SET size = ? WHERE file_path = ?;", (size, file_path))
+
+    @staticmethod
+    def _split_window(date_from, date_to):
+        """Деление промежутка времени пополам с точностью до секунды
+
+        Args:
+            date_from (datetime): Начало промежутка
+            date_to (datetime): Конец промежутка
 
         Returns:
-            dict[str: dict[str: float | str]]: Данных о вакансиях
+            list[tuple[datetime, datetime]]: Две половины промежутка
+        """
+        middle = date_from + timedelta(seconds=(date_to - date_from).total_seconds() // 2)
+        return [(date_from, middle), (middle, date_to)]
+
+    def _get_vacancy_data_from_HHru(self, date_from, date_to, page):
+        """Получение данных о вакансиях за определённый промежуток времени с повтором неудавшихся запросов
+
+        Args:
+            date_from (datetime): Время, с которого начать брать данные
+            date_to (datetime): Время, заканчивая которым брать данные
+            page (int): Страница данных
+
+        Returns:
+            dict[str: any]: Страница ответа api: вакансии, их общее количество и количество страниц
         """
         params = {
             'specialization': 1,
             'only_with_salary': True,
-            'date_from': f'{date}T{time_from}',
-            'date_to': f'{date}T{time_to}',
-            'per_page': 100,
+            'date_from': date_from.strftime('%Y-%m-%dT%H:%M:%S'),
+            'date_to': date_to.strftime('%Y-%m-%dT%H:%M:%S'),
+            'per_page': self.per_page,
             'page': page
         }
-        req = requests.get('https://api.hh.ru/vacancies', params)
-        vacancy_data = req.content.decode()
-        req.close()
-        return vacancy_data
+        for attempt in range(self.retries + 1):
+            self.rate_limiter.acquire()
+            try:
+                with self.session.get(self.url, params=params, timeout=30) as req:
+                    req.raise_for_status()
+                    return req.json()
+            except (requests.RequestException, ValueError):
+                if attempt == self.retries:
+                    raise
+                time.sleep(self.backoff * 2 ** attempt)
 
 
 class DataSet:
     """Класс для получения информации из файла csv формата и базовой работы над данными из него
 
+    Attributes:
+        currency_to_rur (dict[str: float]): Курсы валют на случай, если котировки за месяц нет
+        popular_currencies (list[str]): Валюты, вакансии в которых учитываются
     """
-    def split_csv_by_year(self, db_connector, file_path):
-        """Разделение csv файла по годам.
+    currency_to_rur = CurrencyRates.fallback_rates
+    _newline_pattern = re.compile(rb'\r\n?|\n')
+    _published_at_pattern = re.compile(rb',"?(\d{4})-\d\d-\d\dT\d\d:\d\d:\d\d[+-]\d{4}"?(?=[\r\n]|\Z)')
+    popular_currencies = ['USD', 'RUR', 'EUR', 'KZT', 'UAH', 'BYR']
+
+    def split_csv_by_year(self, db_connector, file_path, chunk_size=10000, consumer_pool=None,
+                          range_size=16 * 1024 * 1024, engine='python', without_rowid=False, bulk_load=False,
+                          columnar_cache=False, verbose=False):
+        """Разделение csv файла по годам. Файл читается потоково: строки проверяются, оклад переводится в рубли
+            и записывается в часть таблицы vacancies своего года порциями, поэтому расход памяти не зависит от
+            размера файла. Если передан consumer_pool, файл делится на байтовые диапазоны по границам записей,
+            которые разбираются параллельно его процессами. При engine='numpy' оклады переводятся в рубли
+            векторно, через матрицу курсов (месяц × валюта). При columnar_cache=True вакансии каждого года
+            дополнительно сохраняются в файл years/{год}.feather, если установлен pyarrow
 
         Args:
+            db_connector (sqlite3.connect): Коннектор к базе данных
             file_path (str): Путь к csv файлу
+            chunk_size (int): Максимальное количество строк в одной порции
+            consumer_pool (ConsumerPool | None): Группа процессов для параллельного разбора файла
+            range_size (int): Максимальный размер одного байтового диапазона
+            engine (str): Способ перевода окладов в рубли: 'python' (построчно) или 'numpy' (векторно)
+            without_rowid (bool): Создавать ли таблицу vacancies WITHOUT ROWID
+            bulk_load (bool): Загружать ли таблицу vacancies в режиме массовой загрузки
+            columnar_cache (bool): Сохранять ли вакансии по годам в feather файлы
+            verbose (bool): Печатать ли скорость загрузки таблицы vacancies
         """
-        (headers, years_vacancy_info) = self._read_big_csv(file_path)
-        popular_currencies = ['USD','RUR','EUR','KZT','UAH','BYR'] #self._get_most_popular_currencies(years_vacancy_info)
-        currency_db = CurrencyApiConnect(db_connector)
-        quotes = currency_db.get_currency_quotes(self._get_year_borders(years_vacancy_info))
-        currency_db.save_currency_quotes_in_db(quotes, popular_currencies)
-        popular_currency_quotes = currency_db.read_currency_quotes_from_db(popular_currencies)
-
-        filtered_years_vacancy_info = {}
-        currency_to_rur = {"AZN": 35.68, "BYR": 23.91, "EUR": 59.90, "GEL": 21.74, "KGS": 0.76,
-                           "KZT": 0.13, "RUR": 1, "UAH": 1.64, "USD": 60.66, "UZS": 0.0055}
-        for year, year_info in years_vacancy_info.items():
-            filtered_year_info = []
-            for vacancy_info in year_info:
-                if vacancy_info[3] not in popular_currencies \
-                        or any(map(lambda x: x == '', (vacancy_info[0], vacancy_info[3], vacancy_info[-2], vacancy_info[-1]))): continue
-                quote_value = popular_currency_quotes[vacancy_info[-1][:7]][vacancy_info[3]]
-                salary = float(quote_value if quote_value != None else currency_to_rur[vacancy_info[3]]) \
-                         * (self._int_or_default(vacancy_info[1], 0) + self._int_or_default(vacancy_info[2], 0)) / 2
-                if salary == 0: continue
-                filtered_year_info.append((vacancy_info[0], salary, vacancy_info[4], vacancy_info[5]))
-            filtered_years_vacancy_info[year] = filtered_year_info
+        popular_currencies = self.popular_currencies #self._get_most_popular_currencies(years_vacancy_info)
+        if consumer_pool is not None:
+            (headers, byte_ranges) = self._get_byte_ranges(
+                file_path, min(range_size, stat(file_path).st_size // (consumer_pool.consumers_count * 4) + 1))
+        popular_currency_quotes = self._get_currency_quotes(db_connector, self._get_year_borders(file_path))
+        if engine == 'numpy':
+            popular_currency_quotes = self._get_rate_matrix(popular_currencies, popular_currency_quotes.quotes)
+        convert_vacancy_info = self._get_converter(engine)
 
         self._delete_files_in_folder('years/*')
         # self._create_years_csv(['name', 'salary', 'area_name', 'published_at'], filtered_years_vacancy_info)
-        self._create_years_db(db_connector, filtered_years_vacancy_info)
+        if consumer_pool is not None:
+            years_vacancy_chunks = consumer_pool.imap_unordered(
+                SplitTask(file_path, byte_range, len(headers), self, popular_currencies, popular_currency_quotes, engine)
+                for byte_range in byte_ranges)
+        else:
+            years_vacancy_chunks = (convert_vacancy_info(chunk, popular_currencies, popular_currency_quotes)
+                                    for chunk in self._read_big_csv(file_path, chunk_size))
+        self._create_years_db(db_connector, years_vacancy_chunks, without_rowid, bulk_load, verbose=verbose)
+        if columnar_cache and feather is not None:
+            self._create_years_feather(db_connector)
+            self._set_columnar_cache_source(db_connector, file_path)
+
+    def is_columnar_cache_fresh(self, db_connector, file_path):
+        """Проверка, что feather файлы по годам созданы из этой версии csv файла и их можно читать вместо него
+
+        Args:
+            db_connector (sqlite3.connect): Коннектор к базе данных
+            file_path (str): Путь к csv файлу
+
+        Returns:
+            bool: Актуален ли кэш
+        """
+        if feather is None:
+            return False
+        db_cursor = db_connector.cursor()
+        db_cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'meta';")
+        if db_cursor.fetchone() is None:
+            return False
+        db_cursor.execute("SELECT value FROM meta WHERE key = 'columnar_cache_source';")
+        row = db_cursor.fetchone()
+        return row is not None and row[0] == self._get_file_signature(file_path)
+
+    def _set_columnar_cache_source(self, db_connector, file_path):
+        """Запись в таблицу meta, из какой версии csv файла созданы feather файлы
+
+        Args:
+            db_connector (sqlite3.connect): Коннектор к базе данных
+            file_path (str | None): Путь к csv файлу или None, если кэша нет
+        """
+        with db_connector:
+            db_connector.execute("CREATE TABLE IF NOT EXISTS meta(\nkey TEXT PRIMARY KEY,\nvalue TEXT);")
+            if file_path is None:
+                db_connector.execute("DELETE FROM meta WHERE key = 'columnar_cache_source';")
+            else:
+                db_connector.execute("INSERT OR REPLACE INTO meta\nVALUES('columnar_cache_source', ?);",
+                                     (self._get_file_signature(file_path),))
 
-    def _read_big_csv(self, file_path):
+    @staticmethod
+    def _get_file_signature(file_path):
+        """Подпись версии файла: путь, размер и время изменения
+
+        Args:
+            file_path (str): Путь к файлу
+
+        Returns:
+            str: Подпись файла
+        """
+        file_stat = stat(file_path)
+        return f"{file_path}:{file_stat.st_size}:{file_stat.st_mtime_ns}"
+
+    def get_vacancies_from_csv(self, db_connector, file_path, chunk_size=10000):
+        """Потоковое чтение небольшого csv файла, например с вакансиями за день, с переводом оклада в рубли, без
+            записи в таблицу vacancies
+
+        Args:
+            db_connector (sqlite3.connect): Коннектор к базе данных с котировками валют
+            file_path (str): Путь к csv файлу
+            chunk_size (int): Максимальное количество строк в одной порции
+
+        Returns:
+            generator: Вакансии (VacancyRow) и полные даты их публикации
+        """
+        popular_currency_quotes = self._get_currency_quotes(db_connector, self._get_year_borders(file_path))
+        for chunk in self._read_big_csv(file_path, chunk_size):
+            for (year, vacancies) in self._convert_vacancy_info(chunk, self.popular_currencies,
+                                                                popular_currency_quotes).items():
+                for (name, salary, area_name, published_at) in vacancies:
+                    yield VacancyRow(name, salary, intern(area_name), year), published_at
+
+    def _get_currency_quotes(self, db_connector, year_borders):
+        """Получение котировок популярных валют за годы: недостающие месяцы загружаются и сохраняются в db файл
+
+        Args:
+            db_connector (sqlite3.connect): Коннектор к базе данных
+            year_borders (tuple[str, str]): Первый и последний год
+
+        Returns:
+            CurrencyRates: Курсы валют по месяцам
+        """
+        currency_db = CurrencyApiConnect(db_connector)
+        currency_db.save_currency_quotes_in_db(currency_db.get_currency_quotes(year_borders), self.popular_currencies)
+        return CurrencyRates(currency_db.read_currency_quotes_from_db(self.popular_currencies))
+
+    def _get_byte_ranges(self, file_path, range_size):
+        """Деление файла на байтовые диапазоны, границы которых совпадают с концами записей. Перевод строки
+            считается концом записи, только если число кавычек до него чётно, поэтому переводы строк внутри
+            полей в кавычках не разрывают запись
+
+        Args:
+            file_path (str): Путь к csv файлу
+            range_size (int): Примерный размер одного диапазона
+
+        Returns:
+            tuple[list[str], list[tuple[int, int]]]: Названия столбцов и диапазоны [начало, конец) без заголовка
+        """
+        def find_record_end(position, quotes_count):
+            """Поиск ближайшего конца записи, начиная с позиции. Концом записи считаются \n, \r\n и одиночный \r
+
+            Args:
+                position (int): Позиция, с которой начинается поиск
+                quotes_count (int): Количество кавычек до позиции
+
+            Returns:
+                tuple[int, int]: Позиция после конца записи и количество кавычек до неё
+            """
+            while True:
+                newline = self._newline_pattern.search(mm, position)
+                if newline is None:
+                    return len(mm), quotes_count + mm[position:].count(b'"')
+                quotes_count += mm[position:newline.start()].count(b'"')
+                position = newline.end()
+                if quotes_count % 2 == 0:
+                    return position, quotes_count
+
+        with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            (start, quotes_count) = find_record_end(0, 0)
+            headers = next(csv.reader(io.StringIO(mm[:start].decode('utf-8-sig'), newline='')))
+            byte_ranges = []
+            while start < len(mm):
+                target = min(start + range_size, len(mm))
+                quotes_count += mm[start:target].count(b'"')
+                (end, quotes_count) = find_record_end(target, quotes_count) if target < len(mm) \
+                    else (target, quotes_count)
+                byte_ranges.append((start, end))
+                start = end
+        return headers, byte_ranges
+
+    def _read_csv_range(self, file_path, byte_range, headers_len):
+        """Чтение записей csv файла из байтового диапазона. Переводы строк приводятся к \n так же, как при чтении
+            файла в текстовом режиме в _read_big_csv, в том числе внутри полей в кавычках
+
+        Args:
+            file_path (str): Путь к csv файлу
+            byte_range (tuple[int, int]): Начало и конец диапазона
+            headers_len (int): Количество столбцов файла
+
+        Returns:
+            list[list[str]]: Строки диапазона с правильным количеством столбцов
+        """
+        with open(file_path, 'rb') as f:
+            f.seek(byte_range[0])
+            data = f.read(byte_range[1] - byte_range[0]).decode('utf-8')
+        return [row for row in csv.reader(io.StringIO(data, newline=None)) if len(row) == headers_len]
+
+    def _read_big_csv(self, file_path, chunk_size):
         headers = []
-        years_info = {}
+        chunk = []
         with open(file_path, encoding="utf-8-sig") as f:
-            for row in map(lambda x: x, csv.reader(f)):
+            for row in csv.reader(f):
                 if len(headers) == 0:
                     headers = row
                     continue
                 if len(row) != len(headers):
                     continue
-                year = row[-1][0:4]
-                if year in years_info:
-                    years_info[year].append(row)
-                elif year in ['2003', '2004', '2005']:
-                    years_info[year] = [row]
-        return headers, years_info
+                chunk.append(row)
+                if len(chunk) == chunk_size:
+                    yield chunk
+                    chunk = []
+        if len(chunk) != 0:
+            yield chunk
+
+    def _convert_vacancy_info(self, vacancy_chunk, popular_currencies, popular_currency_quotes):
+        """Проверка строк порции, перевод оклада в рубли и распределение строк по годам
+
+        Args:
+            vacancy_chunk (list[list[str]]): Строки csv файла
+            popular_currencies (list[str]): Валюты, для которых есть котировки
+            popular_currency_quotes (CurrencyRates): Курсы валют по месяцам
+
+        Returns:
+            dict[str: list[tuple[str, float, str, str]]]: Строки порции, разделённые по годам
+        """
+        filtered_years_vacancy_info = {}
+        for vacancy_info in vacancy_chunk:
+            if vacancy_info[3] not in popular_currencies \
+                    or any(map(lambda x: x == '', (vacancy_info[0], vacancy_info[3], vacancy_info[-2], vacancy_info[-1]))): continue
+            salary = popular_currency_quotes.get_rate(vacancy_info[3], vacancy_info[-1][:7]) \
+                     * (self._int_or_default(vacancy_info[1], 0) + self._int_or_default(vacancy_info[2], 0)) / 2
+            if salary == 0: continue
+            filtered_years_vacancy_info.setdefault(vacancy_info[-1][:4], []) \
+                .append((vacancy_info[0], salary, vacancy_info[4], vacancy_info[5]))
+        return filtered_years_vacancy_info
+
+    def _get_converter(self, engine):
+        """Выбор метода перевода окладов в рубли
+
+        Args:
+            engine (str): 'python' или 'numpy'
+
+        Returns:
+            method: Метод с сигнатурой _convert_vacancy_info
+        """
+        return {'python': self._convert_vacancy_info, 'numpy': self._convert_vacancy_info_vectorized}[engine]
+
+    def _get_rate_matrix(self, popular_currencies, popular_currency_quotes):
+        """Построение матрицы курсов (месяц × валюта); отсутствующие котировки заменяются курсами currency_to_rur
+
+        Args:
+            popular_currencies (list[str]): Валюты, для которых есть котировки
+            popular_currency_quotes (dict[str: dict[str: float]]): Котировки валют по месяцам
+
+        Returns:
+            pd.DataFrame: Курсы валют, строки - месяцы, столбцы - валюты
+        """
+        rate_matrix = pd.DataFrame.from_dict(popular_currency_quotes, orient='index', columns=popular_currencies,
+                                             dtype=float)
+        return rate_matrix.fillna({currency: self.currency_to_rur[currency] for currency in popular_currencies})
+
+    def _convert_vacancy_info_vectorized(self, vacancy_chunk, popular_currencies, rate_matrix):
+        """Векторный вариант _convert_vacancy_info: проверка строк порции, перевод оклада в рубли и распределение
+            строк по годам выполняются операциями над столбцами
+
+        Args:
+            vacancy_chunk (list[list[str]]): Строки csv файла
+            popular_currencies (list[str]): Валюты, для которых есть котировки
+            rate_matrix (pd.DataFrame): Матрица курсов, построенная _get_rate_matrix
+
+        Returns:
+            dict[str: list[tuple[str, float, str, str]]]: Строки порции, разделённые по годам
+        """
+        if len(vacancy_chunk) == 0:
+            return {}
+        info = pd.DataFrame(vacancy_chunk)
+        (name, currency, area_name, published_at) = (info.iloc[:, 0], info.iloc[:, 3], info.iloc[:, -2],
+                                                     info.iloc[:, -1])
+        mask = (currency.isin(popular_currencies) & (name != '') & (area_name != '') & (published_at != '')).to_numpy()
+        info = info[mask]
+        if len(info) == 0:
+            return {}
+        (salary_from, salary_to) = (pd.to_numeric(info.iloc[:, column].str.partition('.')[0].replace('', '0'))
+                                    .to_numpy() for column in (1, 2))
+        month_index = rate_matrix.index.get_indexer(info.iloc[:, -1].str[:7])
+        currency_index = rate_matrix.columns.get_indexer(info.iloc[:, 3])
+        rates = np.where(month_index != -1, rate_matrix.to_numpy()[month_index, currency_index],
+                         info.iloc[:, 3].map(self.currency_to_rur).to_numpy(dtype=float))
+        salary = rates * (salary_from + salary_to) / 2
+        info = info.assign(salary=salary, year=info.iloc[:, -1].str[:4])[salary != 0]
+        return {year: list(zip(year_info.iloc[:, 0], year_info['salary'].tolist(), year_info.iloc[:, 4],
+                               year_info.iloc[:, 5]))
+                for (year, year_info) in info.groupby('year', sort=False)}
 
     def _get_most_popular_currencies(self, years_vacancy_info):
         currency_count = {}
@@ -317,9 +912,20 @@ class DataSet:
                     currency_count[vacancy_info[3]] += 1
         return [pair[0] for pair in currency_count.items() if pair[1] >= 5000]
 
-    def _get_year_borders(self, years_vacancy_info):
-        keys = list(years_vacancy_info.keys())
-        return years_vacancy_info[keys[0]][0][-1][:4], years_vacancy_info[keys[-1]][0][-1][:4]
+    def _get_year_borders(self, file_path):
+        """Поиск первого и последнего года публикации вакансий. Файл не разбирается как csv: годы берутся из
+            дат публикации в конце записей поиском по отображению файла в память, поэтому файл разбирается
+            полностью только один раз, при разделении по годам
+
+        Args:
+            file_path (str): Путь к csv файлу
+
+        Returns:
+            tuple[str, str]: Первый и последний год
+        """
+        with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            years = {match.group(1) for match in self._published_at_pattern.finditer(mm)}
+        return min(years).decode(), max(years).decode()
 
     def _int_or_default(self, value, default):
         dotIndex = value.find('.')
@@ -337,35 +943,115 @@ class DataSet:
     #             file_writer.writerow(headers)
     #             file_writer.writerows(info)
 
-    def _create_years_db(self, db_connect, years_vacancy_info):
-        db_cursor = db_connect.cursor()
-        i = -1
-        for year, info in years_vacancy_info.items():
-            db_cursor.execute(f"CREATE TABLE vacancies_for_{year}(\n"
-                                  f"vacancy_id INTEGER PRIMARY KEY,\n"
-                                  f"name TEXT,\n"
-                                  f"salary REAL,\n"
-                                  f"area_name TEXT,\n"
-                                  f"published_at TEXT)")
-            db_connect.commit()
-            db_cursor.executemany(f"INSERT INTO vacancies_for_{year}\nVALUES(?, ?, ?, ?, ?);",
-                                  [(i := i + 1, vacancy_info[0], vacancy_info[1], vacancy_info[2], vacancy_info[3])
-                                   for vacancy_info in info])
-        db_connect.commit()
+    def _create_years_db(self, db_connect, years_vacancy_chunks, without_rowid=False, bulk_load=False,
+                         keep_other_years=False, verbose=False):
+        """Запись вакансий в таблицу vacancies, разделённую на части по году. Перед записью таблица очищается,
+            а при keep_other_years=True очищаются только части встреченных годов, поэтому повторная загрузка года
+            заменяет его, не трогая остальные. В режиме bulk_load на время загрузки включаются WAL,
+            synchronous=OFF и большой кэш, индексы строятся после записи данных, в конце выполняется ANALYZE;
+            индексы и прежние настройки восстанавливаются и при ошибке. Отметка о feather файлах стирается, так
+            как они больше не совпадают с таблицей
 
-    def get_vacancies_from_file(self, csv_year_file_path):
-        """Чтение информации из csv файла определённого года и запись в список списков, в котором каждому внутреннему
-            списку соответствует одна строка из файла
+        Args:
+            db_connect (sqlite3.connect): Коннектор к базе данных
+            years_vacancy_chunks (iterable[dict[str: list[tuple[str, float, str, str]]]]): Порции строк по годам
+            without_rowid (bool): Создавать ли таблицу WITHOUT ROWID, чтобы строки хранились сгруппированными по году
+            bulk_load (bool): Использовать ли режим массовой загрузки
+            keep_other_years (bool): Оставлять ли в таблице годы, которых нет среди записываемых
+            verbose (bool): Печатать ли скорость загрузки
+        """
+        def vacancy_rows(year, info):
+            """Формирование строк для вставки без промежуточного списка
+
+            Args:
+                year (str): Год
+                info (list[tuple[str, float, str, str]]): Вакансии года из порции
+
+            Returns:
+                generator: Строки таблицы vacancies
+            """
+            nonlocal rows_count
+            for vacancy_info in info:
+                vacancy_ids[year] += 1
+                rows_count += 1
+                yield int(year), vacancy_ids[year], vacancy_info[0], vacancy_info[1], vacancy_info[2], vacancy_info[3]
+
+        indexes_query = "CREATE INDEX IF NOT EXISTS vacancies_area_name ON vacancies(area_name);\n" \
+                        "CREATE INDEX IF NOT EXISTS vacancies_year_name ON vacancies(year, name);"
+        self._set_columnar_cache_source(db_connect, None)
+        db_cursor = db_connect.cursor()
+        db_cursor.execute("CREATE TABLE IF NOT EXISTS vacancies(\n"
+                          "year INTEGER,\n"
+                          "vacancy_id INTEGER,\n"
+                          "name TEXT,\n"
+                          "salary REAL,\n"
+                          "area_name TEXT,\n"
+                          "published_at TEXT,\n"
+                          "PRIMARY KEY (year, vacancy_id))" + (" WITHOUT ROWID;" if without_rowid else ";"))
+        if bulk_load:
+            (journal_mode, synchronous, cache_size) = (db_cursor.execute("PRAGMA journal_mode;").fetchone()[0],
+                                                       db_cursor.execute("PRAGMA synchronous;").fetchone()[0],
+                                                       db_cursor.execute("PRAGMA cache_size;").fetchone()[0])
+            db_cursor.execute("PRAGMA journal_mode=WAL;")
+            db_cursor.execute("PRAGMA synchronous=OFF;")
+            db_cursor.execute("PRAGMA cache_size=-262144;")
+            db_cursor.executescript("DROP INDEX IF EXISTS vacancies_area_name;\n"
+                                    "DROP INDEX IF EXISTS vacancies_year_name;")
+        else:
+            db_cursor.executescript(indexes_query)
+        start_time = time.perf_counter()
+        rows_count = 0
+        vacancy_ids = {}
+        try:
+            if not keep_other_years:
+                db_cursor.execute("DELETE FROM vacancies;")
+            for years_vacancy_info in years_vacancy_chunks:
+                for year, info in years_vacancy_info.items():
+                    if year not in vacancy_ids:
+                        if keep_other_years:
+                            db_cursor.execute("DELETE FROM vacancies WHERE year = ?;", (int(year),))
+                        vacancy_ids[year] = -1
+                    db_cursor.executemany("INSERT INTO vacancies\nVALUES(?, ?, ?, ?, ?, ?);",
+                                          vacancy_rows(year, info))
+                db_connect.commit()
+        except BaseException:
+            db_connect.rollback()
+            raise
+        finally:
+            if bulk_load:
+                db_cursor.executescript(indexes_query + "\nANALYZE;")
+                db_cursor.execute(f"PRAGMA journal_mode={journal_mode};")
+                db_cursor.execute(f"PRAGMA synchronous={synchronous};")
+                db_cursor.execute(f"PRAGMA cache_size={cache_size};")
+        if verbose:
+            elapsed_time = time.perf_counter() - start_time
+            print(f"Загружено строк: {rows_count} за {elapsed_time:.2f} с ({rows_count / elapsed_time:.0f} строк/с)")
+
+    def get_vacancies_from_file(self, db_path, year):
+        """Чтение вакансий определённого года из feather файла, если он есть и актуален, или из db файла
 
         Args:
-            csv_year_file_path (str): Путь к csv файлу определённого года
+            db_path (str): Путь к db файлу
+            year (str): Год, вакансии которого нужно прочитать
 
         Returns:
-            list[list[str]]: Форматированный список вакансий
+            list[VacancyRow]: Вакансии за год, готовые для составления статистики
         """
         # info = self._read_csv(csv_year_file_path)[1:]
-        info = self._read_db(csv_year_file_path)[1:]
-        return self._create_vacancies(info)
+        return list(self._read_year(db_path, year))
+
+    def get_years_from_db(self, db_connect):
+        """Получение годов, для которых в db файле есть вакансии
+
+        Args:
+            db_connect (sqlite3.connect): Коннектор к базе данных
+
+        Returns:
+            list[str]: Годы по возрастанию
+        """
+        db_cursor = db_connect.cursor()
+        db_cursor.execute("SELECT DISTINCT year FROM vacancies ORDER BY year;")
+        return [str(row[0]) for row in db_cursor.fetchall()]
 
     # def _read_csv(self, file_path):
     #     """Чтение информации из csv файла я запись в список списков, в котором каждому внутреннему списку
@@ -382,156 +1068,228 @@ class DataSet:
     #         reader_info.pop(0)
     #     return reader_info
 
-    def _read_db(self, db_connector):
-        """Чтение информации из таблицы и запись в список списков, в котором каждому внутреннему списку
-            соответствует одна строка из таблицы
+    def _create_years_feather(self, db_connect):
+        """Запись вакансий каждого года из таблицы vacancies в несжатый файл years/{год}.feather, который потом
+            читается через отображение в память и только нужными столбцами
 
         Args:
-            db_connector (sqlite3): Название таблицы
-
-        Returns:
-            list[list[str]]: Форматированный список вакансий
+            db_connect (sqlite3.connect): Коннектор к базе данных
         """
-        a =  1 + 1
-        db_cursor = db_connector.cursor()
-        # self.db_cursor.execute("SELECT * FROM quotes;")
-        # date_and_quotes = self.db_cursor.fetchall()
-        # quotes_for_years = {date_and_quotes[date_index][0]:
-        #                         {currencies[currency_index]: date_and_quotes[date_index][currency_index + 1]
-        #                          for currency_index in range(len(currencies))}
-        #                     for date_index in range(len(date_and_quotes))}
-        # return quotes_for_years
-
-    def _create_vacancies(self, info):
-        """Преобразование данных из csv файла в список вакансий, в котором каждой вакансии соответствует одна строка
-            из файла (для статистики)
+        makedirs('years', exist_ok=True)
+        for year in self.get_years_from_db(db_connect):
+            columns = tuple(zip(*db_connect.execute(
+                "SELECT name, salary, area_name, substr(published_at, 1, 4) FROM vacancies\n"
+                "WHERE year = ?\nORDER BY vacancy_id;", (int(year),)).fetchall()))
+            table = pa.table({'name': pa.array(columns[0], pa.string()), 'salary': pa.array(columns[1], pa.float64()),
+                              'area_name': pa.array(columns[2], pa.string()),
+                              'published_at': pa.array(columns[3], pa.string())})
+            feather.write_feather(table, f"years/{year}.feather", compression='uncompressed')
+
+    def _has_columnar_cache(self, db_path):
+        """Проверка, что feather файлы по годам созданы из текущего содержимого таблицы vacancies: отметка о них
+            стирается при каждой записи таблицы и ставится только после создания файлов
 
         Args:
-            info (list[list[str]]): Строки csv файла
+            db_path (str): Путь к db файлу
 
         Returns:
-            list[Vacancy]: Форматированный список вакансий
+            bool: Можно ли читать feather файлы вместо db файла
         """
-        return [Vacancy(info_row[0], None, None, None, None, None, info_row[1], info_row[2], info_row[3])
-                for info_row in info]
+        try:
+            db_connect = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        except sqlite3.OperationalError:
+            return False
+        try:
+            return db_connect.execute("SELECT value FROM meta WHERE key = 'columnar_cache_source';").fetchone() \
+                is not None
+        except sqlite3.OperationalError:
+            return False
+        finally:
+            db_connect.close()
+
+    def _read_year(self, db_path, year):
+        """Потоковое чтение вакансий за год из feather файла, если он есть и актуален, иначе из db файла
 
+        Args:
+            db_path (str): Путь к db файлу
+            year (str): Год, вакансии которого нужно прочитать
 
-class InputConnect:
-    """Класс для работы над списком Vacancy: полное форматирование, нахождения необходимых вакансий
+        Returns:
+            generator: Вакансии в виде VacancyRow, где published_at - год публикации
+        """
+        if feather is not None and isfile(f"years/{year}.feather") and self._has_columnar_cache(db_path):
+            return self._read_feather(f"years/{year}.feather")
+        return self._read_db(db_path, year)
 
-    """
-    def info_formatter(self, vacancies):
-        """Нормализация данных в вакансиях
+    def _read_feather(self, file_path, batch_size=10000):
+        """Потоковое чтение feather файла года порциями по batch_size строк. Файл отображается в память, и
+            читаются только столбцы VacancyRow
 
         Args:
-            vacancies (list[Vacancy]): Список вакансий
+            file_path (str): Путь к feather файлу
+            batch_size (int): Количество строк, переводимых в объекты python за раз
 
         Returns:
-            list[Vacancy]: Результат форматирования
+            generator: Строки файла в виде VacancyRow с интернированными названиями городов и годами
         """
-        def formatter_published_at(attr_value):
-            """Получение года из строки, содержащей дату
+        def interned_column(column):
+            """Перевод строкового столбца в список python, где одинаковые значения - один и тот же объект
 
             Args:
-                attr_value (str): Значение времени публикации вакансии
+                column (pa.Array): Столбец порции feather файла
 
             Returns:
-                str: Год публикации
+                list[str]: Значения столбца
             """
-            return attr_value[0:4]
+            encoded = column.dictionary_encode()
+            values = [intern(value) for value in encoded.dictionary.to_pylist()]
+            return [values[index] for index in encoded.indices.to_pylist()]
+
+        table = feather.read_table(file_path, columns=list(VacancyRow._fields), memory_map=True)
+        for batch in table.to_batches(batch_size):
+            (names, salaries, area_names, years) = batch.columns
+            yield from map(VacancyRow._make, zip(names.to_pylist(), salaries.to_pylist(),
+                                                 interned_column(area_names), interned_column(years)))
+
+    def _read_db(self, db_path, year, batch_size=10000):
+        """Потоковое чтение части таблицы vacancies за год порциями по batch_size строк. Соединение открывается
+            только для чтения, поэтому разные годы можно читать из нескольких процессов одновременно
+
+        Args:
+            db_path (str): Путь к db файлу
+            year (str): Год, вакансии которого нужно прочитать
+            batch_size (int): Количество строк, получаемых из базы за раз
+
+        Returns:
+            generator: Строки таблицы в виде VacancyRow, где published_at - год публикации. Названия городов и годы
+                интернированы, поэтому повторяющиеся значения хранятся в памяти один раз
+        """
+        db_connect = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        try:
+            db_cursor = db_connect.cursor()
+            db_cursor.execute("SELECT name, salary, area_name, substr(published_at, 1, 4) FROM vacancies\n"
+                              "WHERE year = ?\nORDER BY vacancy_id;", (int(year),))
+            while True:
+                rows = db_cursor.fetchmany(batch_size)
+                if len(rows) == 0:
+                    break
+                for (name, salary, area_name, published_at) in rows:
+                    yield VacancyRow(name, salary, intern(area_name), intern(published_at))
+        finally:
+            db_connect.close()
 
-        for vacancy in vacancies:
-            setattr(vacancy, "published_at", formatter_published_at(getattr(vacancy, "published_at")))
-        return vacancies
 
+class InputConnect:
+    """Класс для работы над списком VacancyRow: нахождение необходимых вакансий и составление статистики
+
+    """
     def year_info_finder(self, vacancies, finder_parameter):
         """Формирование информации по годам о вакансиях: уровень зарплат по годам, уровень зарплат по годам для
-            выбранной вакансии, количество вакансий по годам, количество вакансий по годам для выбранной вакансии,
-            уровень зарплат по городам, количество вакансий по городам, общее количество вакансий
+            выбранной вакансии, количество вакансий по годам, количество вакансий по годам для выбранной вакансии
 
         Args:
-            vacancies (list[Vacancy]): Список вакансий
+            vacancies (list[VacancyRow]): Список вакансий
             finder_parameter (str): Название вакансии в качестве параметра фильтрации
 
         Returns:
             tuple[ dict[int: tuple[int, int]], dict[int: tuple[int, int]], dict[int: int], dict[int: int] ]: Группа
                 списков
         """
-        year = int(vacancies[0].published_at)
-        salaries_year_level, selected_salary_year_level, vacancies_year_count, selected_vacancy_year_count, = \
-            {}, {}, {}, {}
-        for vacancy in vacancies:
-            salary = float(vacancy.salary)
-            if year not in salaries_year_level:
-                salaries_year_level[year] = (salary, 1)
-                vacancies_year_count[year] = 1
-                selected_salary_year_level[year] = (0, 0)
-                selected_vacancy_year_count[year] = 0
-            else:
-                sal_yr_lvl = salaries_year_level[year]
-                salaries_year_level[year] = (sal_yr_lvl[0] + salary, sal_yr_lvl[1] + 1)
-                vacancies_year_count[year] += 1
-            if finder_parameter in vacancy.name:
-                sel_sal_ye_lvl = selected_salary_year_level[year]
-                selected_salary_year_level[year] = (sel_sal_ye_lvl[0] + salary, sel_sal_ye_lvl[1] + 1)
-                selected_vacancy_year_count[year] += 1
-        return self._year_info_calculating(salaries_year_level, selected_salary_year_level, vacancies_year_count,
-                                           selected_vacancy_year_count)
+        return self._year_info_calculating(*self.partial_info_finder(vacancies, finder_parameter)[:2])
 
     def city_info_finder(self, vacancies):
-        """Формирование информации по годам о вакансиях: уровень зарплат по годам, уровень зарплат по годам для
-            выбранной вакансии, количество вакансий по годам, количество вакансий по годам для выбранной вакансии,
-            уровень зарплат по городам, количество вакансий по городам, общее количество вакансий
+        """Формирование информации по городам о вакансиях: уровень зарплат по городам, доля вакансий по городам
 
         Args:
-            vacancies (list[Vacancy]): Список вакансий
+            vacancies (list[VacancyRow]): Список вакансий
 
         Returns:
             tuple[ dict[str: tuple[int, int]], dict[str: int] ]: Группа списков
         """
-        salaries_city_level, vacancies_city_count = {}, {}
+        return self._city_info_calculating(self.partial_info_finder(vacancies, "")[2])
+
+    def partial_info_finder(self, vacancies, finder_parameter):
+        """Подсчёт частичной статистики зарплат по годам и городам за один проход по вакансиям. Результаты для разных
+            частей данных объединяются методом merge_partial_info, поэтому процессам достаточно вернуть только их
+
+        Args:
+            vacancies (iterable[VacancyRow]): Вакансии
+            finder_parameter (str): Название вакансии в качестве параметра фильтрации
+
+        Returns:
+            tuple[dict[int: Aggregate], dict[int: Aggregate], dict[str: Aggregate]]: Статистика зарплат по годам,
+                по годам для выбранной вакансии и по городам
+        """
+        salaries_year_level, selected_salary_year_level, salaries_city_level = {}, {}, {}
         for vacancy in vacancies:
             salary = float(vacancy.salary)
+            year = int(vacancy.published_at)
+            if year not in salaries_year_level:
+                salaries_year_level[year] = Aggregate()
+                selected_salary_year_level[year] = Aggregate()
+            salaries_year_level[year].add(salary)
+            if finder_parameter in vacancy.name:
+                selected_salary_year_level[year].add(salary)
             if vacancy.area_name not in salaries_city_level:
-                vacancies_city_count[vacancy.area_name] = 1
-                salaries_city_level[vacancy.area_name] = (salary, 1)
-            else:
-                sal_ct_lvl = salaries_city_level[vacancy.area_name]
-                salaries_city_level[vacancy.area_name] = (sal_ct_lvl[0] + salary, sal_ct_lvl[1] + 1)
-                vacancies_city_count[vacancy.area_name] += 1
-        return self._city_info_calculating(salaries_city_level, vacancies_city_count, len(vacancies))
+                salaries_city_level[vacancy.area_name] = Aggregate()
+            salaries_city_level[vacancy.area_name].add(salary)
+        return salaries_year_level, selected_salary_year_level, salaries_city_level
 
-    def _year_info_calculating(self, salaries_year_level, selected_salary_year_level, vacancies_year_count,
-                               selected_vacancy_year_count):
-        """Окончательное форматирование словарей, фильтрация, сортировка, выборка первого десятка для некоторых
+    @staticmethod
+    def merge_partial_info(partial_infos):
+        """Объединение частичных результатов partial_info_finder: статистики с одинаковыми ключами объединяются.
+            Новые ключи добавляются в конец, поэтому при объединении частей по порядку следования данных
+            порядок городов совпадает с порядком их первого появления
 
         Args:
-            salaries_year_level (dict[int: tuple[int, int]]): Уровень зарплат по годам
-            selected_salary_year_level (dict[int: tuple[int, int]]): Уровень зарплат по годам для выбранной вакансии
-            vacancies_year_count (dict[int: int]): Количество вакансий по годам
-            selected_vacancy_year_count (dict[int: int]): Количество вакансий по годам для выбранной вакансии
+            partial_infos (iterable[tuple[dict[int | str: Aggregate], ...]]): Частичные результаты
+
+        Returns:
+            tuple[dict[int: Aggregate], dict[int: Aggregate], dict[str: Aggregate]]: Объединённый результат
+        """
+        merged = ({}, {}, {})
+        for partial_info in partial_infos:
+            for (merged_dictionary, dictionary) in zip(merged, partial_info):
+                for (key, aggregate) in dictionary.items():
+                    if key not in merged_dictionary:
+                        merged_dictionary[key] = Aggregate()
+                    merged_dictionary[key].merge(aggregate)
+        return merged
+
+    def partial_info_calculating(self, partial_info):
+        """Окончательное составление статистики по годам и городам из объединённых частичных результатов
+
+        Args:
+            partial_info (tuple[dict[int | str: Aggregate], ...]): Результат merge_partial_info
+
+        Returns:
+            tuple[tuple[dict, dict, dict, dict], tuple[dict, dict]]: Статистика по годам и статистика по городам
+        """
+        return self._year_info_calculating(*partial_info[:2]), self._city_info_calculating(partial_info[2])
+
+    def _year_info_calculating(self, salaries_year_level, selected_salary_year_level):
+        """Окончательное форматирование словарей: средние зарплаты и количества вакансий по годам
+
+        Args:
+            salaries_year_level (dict[int: Aggregate]): Статистика зарплат по годам
+            selected_salary_year_level (dict[int: Aggregate]): Статистика зарплат по годам для выбранной вакансии
 
         Returns:
             tuple[ dict[int: tuple[int, int]], dict[int: tuple[int, int]], dict[int: int], dict[int: int] ]:
                 Уровень зарплат по годам, Уровень зарплат по годам для выбранной вакансии, Количество вакансий по годам,
                 Количество вакансий по годам для выбранной вакансии
         """
-
-        (salaries_year_level, selected_salary_year_level) = [
-                {dict_pair[0]: int(dict_pair[1][0] / dict_pair[1][1]) if dict_pair[1][1] != 0 else int(dict_pair[1][0])
-                    for dict_pair in dictionary.items()}
-                for dictionary in (salaries_year_level, selected_salary_year_level)]
-
-        return salaries_year_level, selected_salary_year_level, vacancies_year_count, selected_vacancy_year_count
+        return ({year: aggregate.mean() for (year, aggregate) in salaries_year_level.items()},
+                {year: aggregate.mean() for (year, aggregate) in selected_salary_year_level.items()},
+                {year: aggregate.count for (year, aggregate) in salaries_year_level.items()},
+                {year: aggregate.count for (year, aggregate) in selected_salary_year_level.items()})
 
     @staticmethod
-    def _city_info_calculating(salaries_city_level, vacancies_city_count, vacancies_count):
+    def _city_info_calculating(salaries_city_level):
         """Окончательное форматирование словарей, фильтрация, сортировка, выборка первого десятка для некоторых
 
         Args:
-            salaries_city_level (dict[str: tuple[int, int]]): Уровень зарплат по городам
-            vacancies_city_count (dict[str: int]): Количество вакансий по городам
-            vacancies_count (int): Общее количество вакансий
+            salaries_city_level (dict[str: Aggregate]): Статистика зарплат по городам
 
         Returns:
             tuple[ dict[str: tuple[int, int]], dict[str: int] ]: Уровень зарплат по городам, Количество вакансий
@@ -550,14 +1308,13 @@ class InputConnect:
             dict_pairs.sort(key=cmp_to_key(lambda x, y: -1 if x[1] <= y[1] else 1))
             return dict(dict_pairs)
 
-        vacancies_city_count = {dict_pair[0]: float(f"{dict_pair[1] / vacancies_count:.4f}")
-                                for dict_pair in vacancies_city_count.items()}
+        vacancies_count = sum(aggregate.count for aggregate in salaries_city_level.values())
+        vacancies_city_count = {dict_pair[0]: float(f"{dict_pair[1].count / vacancies_count:.4f}")
+                                for dict_pair in salaries_city_level.items()}
         vacancies_city_count = {dict_pair[0]: dict_pair[1] for dict_pair in vacancies_city_count.items() if dict_pair[1] >= 0.01}
         vacancies_city_count = sort_dict(vacancies_city_count)
         vacancies_city_count = {dict_pair[0]: f"{round(dict_pair[1] * 100, 2)}%" for dict_pair in vacancies_city_count.items()}
-        salaries_city_level = {dict_pair[0]:
-                                int(dict_pair[1][0] / dict_pair[1][1]) if dict_pair[1][1] != 0 else int(dict_pair[1][0])
-                               for dict_pair in salaries_city_level.items()}
+        salaries_city_level = {dict_pair[0]: dict_pair[1].mean() for dict_pair in salaries_city_level.items()}
         salaries_city_level = {dict_pair[0]: dict_pair[1] for dict_pair in salaries_city_level.items() if dict_pair[0] in vacancies_city_count}
         salaries_city_level = sort_dict(salaries_city_level)
         vacancies_city_count = {k: vacancies_city_count[k] for k in list(vacancies_city_count)[-10:][::-1]}
@@ -565,6 +1322,249 @@ class InputConnect:
         return salaries_city_level, vacancies_city_count
 
 
+class SqlInputConnect(InputConnect):
+    """Класс для составления той же статистики, что и InputConnect, запросами GROUP BY к db файлу, без чтения
+        вакансий в память
+
+    """
+    def year_info_finder(self, db_connect, finder_parameter):
+        """Формирование информации по годам о вакансиях одним запросом к таблице vacancies
+
+        Args:
+            db_connect (sqlite3.connect): Коннектор к базе данных
+            finder_parameter (str): Название вакансии в качестве параметра фильтрации
+
+        Returns:
+            tuple[ dict[int: tuple[int, int]], dict[int: tuple[int, int]], dict[int: int], dict[int: int] ]: Группа
+                списков
+        """
+        return self._year_info_calculating(*self._year_aggregates(db_connect, finder_parameter))
+
+    def city_info_finder(self, db_connect):
+        """Формирование информации по городам о вакансиях одним запросом к таблице vacancies. Города упорядочены по
+            первому появлению, как в InputConnect.city_info_finder
+
+        Args:
+            db_connect (sqlite3.connect): Коннектор к базе данных
+
+        Returns:
+            tuple[ dict[str: tuple[int, int]], dict[str: int] ]: Группа списков
+        """
+        return self._city_info_calculating(self._city_aggregates(db_connect))
+
+    def partial_info_finder(self, db_connect, finder_parameter):
+        """Составление статистики зарплат по годам и городам запросами к таблице vacancies
+
+        Args:
+            db_connect (sqlite3.connect): Коннектор к базе данных
+            finder_parameter (str): Название вакансии в качестве параметра фильтрации
+
+        Returns:
+            tuple[dict[int: Aggregate], dict[int: Aggregate], dict[str: Aggregate]]: Статистика в формате
+                InputConnect.partial_info_finder
+        """
+        return *self._year_aggregates(db_connect, finder_parameter), self._city_aggregates(db_connect)
+
+    def _year_aggregates(self, db_connect, finder_parameter):
+        """Статистика зарплат по годам и по годам для выбранной вакансии
+
+        Args:
+            db_connect (sqlite3.connect): Коннектор к базе данных
+            finder_parameter (str): Название вакансии в качестве параметра фильтрации
+
+        Returns:
+            tuple[dict[int: Aggregate], dict[int: Aggregate]]: Статистика по годам и по годам для выбранной вакансии
+        """
+        salaries_year_level, selected_salary_year_level = {}, {}
+        db_cursor = db_connect.cursor()
+        db_cursor.execute("SELECT year, SUM(salary), COUNT(*), MIN(salary), MAX(salary), SUM(salary * salary),\n"
+                          "SUM(CASE WHEN instr(name, :name) > 0 THEN salary ELSE 0 END),\n"
+                          "COUNT(CASE WHEN instr(name, :name) > 0 THEN 1 END),\n"
+                          "COALESCE(MIN(CASE WHEN instr(name, :name) > 0 THEN salary END), 9e999),\n"
+                          "COALESCE(MAX(CASE WHEN instr(name, :name) > 0 THEN salary END), -9e999),\n"
+                          "SUM(CASE WHEN instr(name, :name) > 0 THEN salary * salary ELSE 0 END)\n"
+                          "FROM vacancies\nGROUP BY year;", {'name': finder_parameter})
+        for (year, *aggregates) in db_cursor.fetchall():
+            salaries_year_level[year] = Aggregate(*aggregates[:5])
+            selected_salary_year_level[year] = Aggregate(*aggregates[5:])
+        return salaries_year_level, selected_salary_year_level
+
+    def _city_aggregates(self, db_connect):
+        """Статистика зарплат по городам в порядке их первого появления
+
+        Args:
+            db_connect (sqlite3.connect): Коннектор к базе данных
+
+        Returns:
+            dict[str: Aggregate]: Статистика по городам
+        """
+        salaries_city_level = {}
+        db_cursor = db_connect.cursor()
+        db_cursor.execute("SELECT area_name, SUM(salary), COUNT(*), MIN(salary), MAX(salary), SUM(salary * salary)\n"
+                          "FROM vacancies\nGROUP BY area_name\nORDER BY MIN(year * 4294967296 + vacancy_id);")
+        for (area_name, *aggregate) in db_cursor.fetchall():
+            salaries_city_level[area_name] = Aggregate(*aggregate)
+        return salaries_city_level
+
+
+class StatisticsStateConnect:
+    """Класс для хранения объединяемой статистики в db файле. Она позволяет добавлять к статистике данные за
+        новый день, не пересчитывая всю историю. Вместе со статистикой хранятся время публикации последней
+        учтённой вакансии в UTC и идентификаторы учтённых вакансий, опубликованных в это время
+
+    Attributes:
+        db_connect (sqlite3.connect): Коннектор к базе данных
+        db_cursor (sqlite3.connect.cursor): Курсор базы данных
+    """
+    scopes = ('year', 'selected_year', 'city')
+
+    def __init__(self, db_connect):
+        """Инициализация объекта StatisticsStateConnect
+
+        Args:
+            db_connect (sqlite3.connect): Коннектор к базе данных
+        """
+        self.db_connect = db_connect
+        self.db_cursor = db_connect.cursor()
+        with self.db_connect:
+            self.db_cursor.execute("CREATE TABLE IF NOT EXISTS statistics_state(\nprofession TEXT,\nscope TEXT,\n"
+                                   "key TEXT,\nposition INTEGER,\nsum REAL,\ncount INTEGER,\nmin REAL,\nmax REAL,\n"
+                                   "sum_sq REAL,\nPRIMARY KEY (profession, scope, key));")
+            self.db_cursor.execute("CREATE TABLE IF NOT EXISTS statistics_boundary(\nprofession TEXT,\n"
+                                   "year INTEGER,\nvacancy_id TEXT,\nPRIMARY KEY (profession, year, vacancy_id));")
+            self.db_cursor.execute("CREATE TABLE IF NOT EXISTS meta(\nkey TEXT PRIMARY KEY,\nvalue TEXT);")
+
+    @staticmethod
+    def normalize_published_at(published_at):
+        """Перевод даты публикации в UTC, в формате функции datetime SQLite, чтобы даты с разными часовыми поясами
+            сравнивались как строки
+
+        Args:
+            published_at (str): Дата и время в формате ГГГГ-ММ-ДДTЧЧ:ММ:СС+ЧЧММ
+
+        Returns:
+            str: Дата и время в UTC в формате ГГГГ-ММ-ДД ЧЧ:ММ:СС
+        """
+        return datetime.strptime(published_at, '%Y-%m-%dT%H:%M:%S%z').astimezone(timezone.utc) \
+            .strftime('%Y-%m-%d %H:%M:%S')
+
+    @staticmethod
+    def get_vacancy_ids(vacancies):
+        """Получение идентификаторов вакансий по их содержимому. У вакансий нет собственного идентификатора,
+            поэтому одинаковые вакансии различаются номером повторения среди переданных
+
+        Args:
+            vacancies (iterable[tuple[str, str, float, str, str]]): Год, название, оклад в рублях, город и дата
+                публикации вакансий
+
+        Returns:
+            list[tuple[int, str]]: Год и идентификатор каждой вакансии
+        """
+        occurrences = {}
+        vacancy_ids = []
+        for vacancy in vacancies:
+            occurrences[vacancy] = occurrences.get(vacancy, -1) + 1
+            vacancy_ids.append((int(vacancy[0]), hashlib.sha1(repr((*vacancy, occurrences[vacancy]))
+                                                               .encode('utf-8')).hexdigest()[:16]))
+        return vacancy_ids
+
+    def read_state(self, profession):
+        """Чтение сохранённой статистики для профессии
+
+        Args:
+            profession (str): Название профессии
+
+        Returns:
+            tuple[dict[int: Aggregate], dict[int: Aggregate], dict[str: Aggregate]] | None: Статистика в формате
+                InputConnect.partial_info_finder или None, если она ещё не сохранялась
+        """
+        state = tuple({} for _ in self.scopes)
+        self.db_cursor.execute("SELECT scope, key, sum, count, min, max, sum_sq FROM statistics_state\n"
+                               "WHERE profession = ?\nORDER BY position;", (profession,))
+        rows = self.db_cursor.fetchall()
+        if len(rows) == 0:
+            return None
+        for (scope, key, *aggregate) in rows:
+            state[self.scopes.index(scope)][int(key) if scope != 'city' else key] = Aggregate(*aggregate)
+        return state
+
+    def save_state(self, profession, state, last_published_at, boundary_vacancy_ids, source=None):
+        """Запись статистики для профессии одной транзакцией вместо сохранённой ранее
+
+        Args:
+            profession (str): Название профессии
+            state (tuple[dict[int | str: Aggregate], ...]): Статистика в формате InputConnect.partial_info_finder
+            last_published_at (str | None): Время публикации последней учтённой вакансии в UTC в формате
+                normalize_published_at
+            boundary_vacancy_ids (iterable[tuple[int, str]]): Год и идентификатор учтённых вакансий, опубликованных
+                в last_published_at
+            source (str | None): Подпись csv файла, по которому статистика посчитана заново, None - не менять
+        """
+        with self.db_connect:
+            self.db_cursor.execute("DELETE FROM statistics_state WHERE profession = ?;", (profession,))
+            self.db_cursor.executemany("INSERT INTO statistics_state\nVALUES(?, ?, ?, ?, ?, ?, ?, ?, ?);",
+                                       ((profession, scope, str(key), position, aggregate.sum, aggregate.count,
+                                         aggregate.min, aggregate.max, aggregate.sum_sq)
+                                        for (scope, dictionary) in zip(self.scopes, state)
+                                        for (position, (key, aggregate)) in enumerate(dictionary.items())))
+            self.db_cursor.execute("DELETE FROM statistics_boundary WHERE profession = ?;", (profession,))
+            self.db_cursor.executemany("INSERT OR IGNORE INTO statistics_boundary\nVALUES(?, ?, ?);",
+                                       ((profession, year, vacancy_id) for (year, vacancy_id) in boundary_vacancy_ids))
+            for (key, value) in ((f"statistics_last_published_at:{profession}", last_published_at),
+                                 (f"statistics_source:{profession}", source)):
+                if value is not None:
+                    self.db_cursor.execute("INSERT INTO meta\nVALUES(?, ?)\n"
+                                           "ON CONFLICT(key) DO UPDATE SET value = excluded.value;", (key, value))
+
+    def _get_meta_value(self, key):
+        """Получение значения из таблицы meta
+
+        Args:
+            key (str): Ключ
+
+        Returns:
+            str | None: Значение или None, если его нет
+        """
+        self.db_cursor.execute("SELECT value FROM meta WHERE key = ?;", (key,))
+        row = self.db_cursor.fetchone()
+        return row[0] if row is not None else None
+
+    def get_last_published_at(self, profession):
+        """Получение времени публикации последней вакансии, учтённой в статистике профессии
+
+        Args:
+            profession (str): Название профессии
+
+        Returns:
+            str | None: Дата и время в UTC в формате ГГГГ-ММ-ДД ЧЧ:ММ:СС
+        """
+        return self._get_meta_value(f"statistics_last_published_at:{profession}")
+
+    def get_boundary_vacancy_ids(self, profession):
+        """Получение идентификаторов учтённых вакансий, опубликованных во время последней учтённой вакансии
+
+        Args:
+            profession (str): Название профессии
+
+        Returns:
+            set[tuple[int, str]]: Год и идентификатор вакансий
+        """
+        self.db_cursor.execute("SELECT year, vacancy_id FROM statistics_boundary WHERE profession = ?;",
+                               (profession,))
+        return set(self.db_cursor.fetchall())
+
+    def get_source(self, profession):
+        """Получение подписи csv файла, по которому статистика профессии посчитана в последний раз целиком
+
+        Args:
+            profession (str): Название профессии
+
+        Returns:
+            str | None: Подпись файла
+        """
+        return self._get_meta_value(f"statistics_source:{profession}")
+
+
 class Report:
     """Класс для генерации файлов по анализу статистики: графиков, excel таблиц, общего pdf-файла
 
@@ -654,18 +1654,53 @@ class Report:
                 for cell in column:
                     cell.border = outline
 
-    def generate_image(self, vacancy_name):
-        """Создание графиков основываясь на словарях аттрибутов объекта Report
+    def generate_image(self, vacancy_name, file_name='graph.png', charts_dir=None, image_format='png',
+                       chart_names=None):
+        """Создание графиков основываясь на словарях аттрибутов объекта Report. Графики рисуются объектным API
+            matplotlib на холсте Agg, без общего состояния pyplot, поэтому отчёты разных профессий можно рисовать
+            параллельно процессами (render_images). Если задан charts_dir, каждый график сохраняется в отдельный
+            файл, в названии которого есть хэш его данных; график, файл которого уже есть, не перерисовывается
 
         Args:
             vacancy_name (str): Название выбранной вакансии
+            file_name (str): Файл для всех четырёх графиков, если charts_dir не задан
+            charts_dir (str | None): Папка для файлов отдельных графиков
+            image_format (str): Формат файлов отдельных графиков: 'png' или 'svg'
+            chart_names (tuple[str] | None): Какие из отдельных графиков рисовать, None - все
+
+        Returns:
+            list[str]: Пути к файлам графиков
         """
-        fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(12, 7.5), layout='constrained')
-        self._generate_salary_year_levels_graph(ax1, vacancy_name)
-        self._generate_vacancy_year_count_graph(ax2, vacancy_name)
-        self._generate_salary_city_levels_graph(ax3)
-        self._generate_vacancy_city_count_graph(ax4)
-        plt.savefig('graph.png')
+        charts = [("salary_year_levels", lambda ax: self._generate_salary_year_levels_graph(ax, vacancy_name),
+                   (vacancy_name, self.salaries_year_level, self.selected_salary_year_level)),
+                  ("vacancy_year_count", lambda ax: self._generate_vacancy_year_count_graph(ax, vacancy_name),
+                   (vacancy_name, self.vacancies_year_count, self.selected_vacancy_year_count)),
+                  ("salary_city_levels", self._generate_salary_city_levels_graph, self.salaries_city_level),
+                  ("vacancy_city_count", self._generate_vacancy_city_count_graph, self.vacancies_city_count)]
+        if charts_dir is None:
+            fig = Figure(figsize=(12, 7.5), layout='constrained')
+            FigureCanvasAgg(fig)
+            for (ax, (_, generate_graph, _)) in zip(fig.subplots(2, 2).flatten(), charts):
+                generate_graph(ax)
+            fig.savefig(file_name)
+            return [file_name]
+
+        makedirs(charts_dir, exist_ok=True)
+        chart_paths = []
+        for (chart_name, generate_graph, chart_data) in charts:
+            if chart_names is not None and chart_name not in chart_names:
+                continue
+            chart_hash = hashlib.sha1(repr(chart_data).encode('utf-8')).hexdigest()[:16]
+            chart_path = f"{charts_dir}/{chart_name}_{chart_hash}.{image_format}"
+            if not isfile(chart_path):
+                fig = Figure(figsize=(6, 3.75), layout='constrained')
+                FigureCanvasAgg(fig)
+                generate_graph(fig.subplots())
+                temp_path = f"{chart_path}.{getpid()}.tmp"
+                fig.savefig(temp_path, format=image_format)
+                replace(temp_path, chart_path)
+            chart_paths.append(chart_path)
+        return chart_paths
 
     def _generate_salary_year_levels_graph(self, ax, vacancy_name):
         """Создание графика уровня зарплат по годам
@@ -727,11 +1762,12 @@ class Report:
         ax.pie(values, labels=ax_labels)
         ax.set_title("Доля вакансий по городам")
 
-    def generate_pdf(self, vacancy_name):
+    def generate_pdf(self, vacancy_name, chart_paths=('graph.png',)):
         """Создание pdf-файла основываясь на словарях аттрибутов объекта Report
 
         Args:
             vacancy_name (str): Название выбранной вакансии
+            chart_paths (list[str]): Пути к файлам графиков, которые вернул generate_image или render_images
         """
         headers1, headers2, headers3 = (["Год", "Средняя зарплата", f"Средняя зарплата - {vacancy_name}",
                                         "Количество вакансий", f"Количество вакансий - {vacancy_name}"],
@@ -745,7 +1781,7 @@ class Report:
 
         env = Environment(loader=FileSystemLoader('.'))
         template = env.get_template("pdf_template.html")
-        pdf_template = template.render(graph_name='graph.png',
+        pdf_template = template.render(graph_names=chart_paths,
                                        vacancy_name=vacancy_name, headers1=headers1, headers2=headers2,
                                        headers3=headers3, rows1=rows1, rows2=rows2, rows3=rows3)
         config = pdfkit.configuration(wkhtmltopdf=r'C:\Program Files\wkhtmltopdf\bin\wkhtmltopdf.exe')
@@ -756,6 +1792,29 @@ class Report:
 ######################################################################################################################
 
 
+class ConsumerError(Exception):
+    """Исключение задачи, выполненной процессом Consumer. Само исключение может не передаваться между процессами,
+        поэтому передаются его тип, сообщение и трассировка в виде строк
+
+    Attributes:
+        type_name (str): Название типа исходного исключения
+        message (str): Сообщение исходного исключения
+        traceback_text (str): Трассировка исходного исключения в процессе Consumer
+    """
+    def __init__(self, type_name, message, traceback_text):
+        """Инициализация объекта ConsumerError
+
+        Args:
+            type_name (str): Название типа исходного исключения
+            message (str): Сообщение исходного исключения
+            traceback_text (str): Трассировка исходного исключения в процессе Consumer
+        """
+        super().__init__(f"{type_name}: {message}\n\n{traceback_text}")
+        self.type_name = type_name
+        self.message = message
+        self.traceback_text = traceback_text
+
+
 class Consumer(multiprocessing.Process):
     """Служит для представления одного процесса, который берёт одну задачу из очереди задач и после выполнения кладёт
         результат в очереди результатов
@@ -771,13 +1830,14 @@ class Consumer(multiprocessing.Process):
             task_queue (multiprocessing.JoinableQueue): Очередь задач
             vacancies_info (multiprocessing.Queue): Очередь, куда будут складываться результаты
         """
-        multiprocessing.Process.__init__(self)
+        multiprocessing.Process.__init__(self, daemon=True)
         self.task_queue = task_queue
         self.results = results
 
     def run(self):
         """Выполняет одну задачу, полученную из списка задач, и сохраняет результат в соответствующих
-            очередях результатов
+            очередях результатов. Исключение задачи не завершает процесс, а передаётся вместо результата в паре
+            (результат, ошибка), где ошибка - тип, сообщение и трассировка исключения строками
 
         """
         while True:
@@ -787,105 +1847,275 @@ class Consumer(multiprocessing.Process):
                 self.task_queue.task_done()
                 break
 
-            answer = temp_task.process()
+            try:
+                answer = (temp_task.process(), None)
+            except Exception as error:
+                answer = (None, (type(error).__name__, str(error), traceback.format_exc()))
             self.task_queue.task_done()
             self.results.put(answer)
 
-class ReadTask():
-    """Представляет собой одну задачу для выполнения процессом Consumer; читает данные из заданного csv файла и
-        форматирует их в вакансии
+
+class ConsumerPool:
+    """Служит для представления группы процессов Consumer, которая запускается один раз и выполняет задачи всех
+        этапов работы, не тратя время на повторный запуск процессов
 
     Attributes:
-        file_name (str): Название файла, из которого нужно брать данные
-        data_set (DadaSet): Объект DadaSet для анализа данных
-        input_connect (InputConnect): Объект InputConnect для форматирования вакансий
+        consumers_count (int): Количество процессов
+        task_queue (multiprocessing.JoinableQueue): Очередь задач
+        results (multiprocessing.Queue): Очередь, куда будут складываться результаты
+        consumers (list[Consumer]): Процессы группы
+        in_work (int): Количество отправленных задач, результаты которых ещё не прочитаны
+        calls_count (int): Количество вызовов imap_unordered
     """
-    def __init__(self, file_name, data_set, input_connect):
-        """Инициализирует один объект класса Task
+    def __init__(self, consumers_count):
+        """Инициализация объекта ConsumerPool и запуск процессов
 
         Args:
-            file_name (str): Название файла, из которого нужно брать данные
-            input_connect (InputConnect): Объект InputConnect для форматирования вакансий
+            consumers_count (int): Количество процессов
         """
-        self.file_name = file_name
+        self.consumers_count = consumers_count
+        self.task_queue = multiprocessing.JoinableQueue()
+        self.results = multiprocessing.Queue()
+        self.consumers = [Consumer(self.task_queue, self.results) for _ in range(consumers_count)]
+        self.in_work = 0
+        self.calls_count = 0
+        for consumer in self.consumers:
+            consumer.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.terminate()
+
+    def imap_unordered(self, tasks):
+        """Выполнение задач процессами группы. В очереди одновременно держится не больше двух задач на процесс, а
+            результаты отдаются по мере готовности, поэтому они не копятся в памяти. Если чтение результатов
+            прервано, оставшиеся задачи не отправляются, а результаты уже отправленных отбрасываются при закрытии
+            генератора, следующем вызове или close. Если задача завершилась исключением, возбуждается ConsumerError
+
+        Args:
+            tasks (iterable[SplitTask | StatisticsTask | ImageTask]): Задачи для выполнения
+
+        Returns:
+            generator: Результаты задач в порядке их готовности
+        """
+        self._discard_results()
+        self.calls_count += 1
+        call_number = self.calls_count
+        tasks = iter(tasks)
+        try:
+            for task in tasks:
+                self.task_queue.put(task)
+                self.in_work += 1
+                if self.in_work == self.consumers_count * 2:
+                    break
+            while self.in_work > 0:
+                (answer, error) = self.results.get()
+                self.in_work -= 1
+                if error is not None:
+                    raise ConsumerError(*error)
+                yield answer
+                for task in tasks:
+                    self.task_queue.put(task)
+                    self.in_work += 1
+                    break
+        finally:
+            if call_number == self.calls_count:
+                self._discard_results()
+
+    def _discard_results(self):
+        """Чтение и отбрасывание результатов задач, отправленных прерванным вызовом imap_unordered. Пока результат
+            лежит в очереди, процесс Consumer не может завершиться
+
+        """
+        while self.in_work > 0:
+            self.results.get()
+            self.in_work -= 1
+
+    def close(self):
+        """Остановка процессов группы после выполнения отправленных задач
+
+        """
+        self._discard_results()
+        for _ in self.consumers:
+            self.task_queue.put(None)
+        self.task_queue.join()
+        for consumer in self.consumers:
+            consumer.join()
+
+    def terminate(self):
+        """Немедленная остановка процессов группы без ожидания отправленных задач, например при ошибке
+
+        """
+        for consumer in self.consumers:
+            consumer.terminate()
+        for consumer in self.consumers:
+            consumer.join()
+        self.in_work = 0
+        self.task_queue.cancel_join_thread()
+        self.task_queue.close()
+        self.results.close()
+
+
+class SplitTask():
+    """Представляет собой одну задачу для выполнения процессом Consumer; разбирает байтовый диапазон csv файла,
+        переводит оклады в рубли и делит строки по годам
+
+    Attributes:
+        file_path (str): Путь к csv файлу
+        byte_range (tuple[int, int]): Начало и конец диапазона
+        headers_len (int): Количество столбцов файла
+        data_set (DataSet): Объект DataSet для чтения файла
+        popular_currencies (list[str]): Валюты, для которых есть котировки
+        popular_currency_quotes (CurrencyRates | pd.DataFrame): Курсы валют по месяцам
+        engine (str): Способ перевода окладов в рубли
+    """
+    def __init__(self, file_path, byte_range, headers_len, data_set, popular_currencies, popular_currency_quotes,
+                 engine='python'):
+        """Инициализирует один объект класса SplitTask
+
+        Args:
+            file_path (str): Путь к csv файлу
+            byte_range (tuple[int, int]): Начало и конец диапазона
+            headers_len (int): Количество столбцов файла
+            data_set (DataSet): Объект DataSet для чтения файла
+            popular_currencies (list[str]): Валюты, для которых есть котировки
+            popular_currency_quotes (CurrencyRates | pd.DataFrame): Курсы валют по месяцам
+            engine (str): Способ перевода окладов в рубли: 'python' или 'numpy'
+        """
+        self.file_path = file_path
+        self.byte_range = byte_range
+        self.headers_len = headers_len
         self.data_set = data_set
-        self.input_connect = input_connect
+        self.popular_currencies = popular_currencies
+        self.popular_currency_quotes = popular_currency_quotes
+        self.engine = engine
 
     def process(self):
         """Служит командой, которую нужно будет выполнять процессу Consumer
 
         Returns:
-            list[Vacancy]: Список вакансий за соответствующий год и словари, содержащие статистику
+            dict[str: list[tuple[str, float, str, str]]]: Строки диапазона, разделённые по годам
         """
-        vacancies = self.data_set.get_vacancies_from_file(self.file_name)
-        formatted_vacancies = self.input_connect.info_formatter(vacancies)
-        return formatted_vacancies
+        return self.data_set._get_converter(self.engine)(
+            self.data_set._read_csv_range(self.file_path, self.byte_range, self.headers_len),
+            self.popular_currencies, self.popular_currency_quotes)
 
 
-class CalculateTask():
-    """Представляет собой одну задачу для выполнения процессом Consumer; составляет статистику о вакансиях
-        по определённому году и заданной профессии
+class StatisticsTask():
+    """Представляет собой одну задачу для выполнения процессом Consumer; читает вакансии определённого года из
+        db файла через собственное соединение и считает по ним частичные суммы и количества по годам и городам.
+        Сами вакансии не возвращаются, поэтому через очередь передаются только небольшие словари
 
     Attributes:
+        db_path (str): Путь к db файлу
+        year (str): Год, вакансии которого нужно прочитать
+        vacancy_name (str): Название вакансии для составления статистики
         data_set (DadaSet): Объект DadaSet для анализа данных
-        vacancies (list[Vacancy]): Вакансии для анализа
-        input_connect (InputConnect): Объект InputConnect для форматирования и составления статистики по данным
+        input_connect (InputConnect): Объект InputConnect для составления статистики по данным
     """
-    def __init__(self, vacancy_name, vacancies, input_connect):
+    def __init__(self, db_path, year, vacancy_name, data_set, input_connect):
         """Инициализирует один объект класса Task
 
         Args:
+            db_path (str): Путь к db файлу
+            year (str): Год, вакансии которого нужно прочитать
             vacancy_name (str): Название вакансии для составления статистики
-            vacancies (list[Vacancy]): Вакансии для анализа
-            input_connect (InputConnect): Объект InputConnect для форматирования и составления статистики по данным
+            data_set (DadaSet): Объект DadaSet для анализа данных
+            input_connect (InputConnect): Объект InputConnect для составления статистики по данным
         """
+        self.db_path = db_path
+        self.year = year
         self.vacancy_name = vacancy_name
-        self.vacancies = vacancies
+        self.data_set = data_set
         self.input_connect = input_connect
 
     def process(self):
         """Служит командой, которую нужно будет выполнять процессу Consumer
 
         Returns:
-            tuple[list[Vacancy], tuple[dict[int: tuple[int, int]], dict[int: tuple[int, int]],
-             dict[int: int], dict[int: int]]: Список вакансий за соответствующий год и словари, содержащие статистику
+            tuple[str, tuple[dict, ...]]: Год и частичный результат InputConnect.partial_info_finder за этот год
         """
-        return self.input_connect.year_info_finder(self.vacancies, self.vacancy_name)
+        vacancies = self.data_set._read_year(self.db_path, self.year)
+        return self.year, self.input_connect.partial_info_finder(vacancies, self.vacancy_name)
 
 
-def get_statistics():
-    """Получение информации с csv файла и создание графиков, таблиц и общего pdf-файл со статистикой
-        на основе вводимых пользователем данных
+class ImageTask():
+    """Представляет собой одну задачу для выполнения процессом Consumer; рисует графики отчёта одной профессии
 
+    Attributes:
+        report (Report): Отчёт профессии
+        vacancy_name (str): Название профессии
+        charts_dir (str): Папка для файлов графиков
+        image_format (str): Формат файлов графиков
+        chart_names (tuple[str] | None): Какие графики рисовать
     """
-    def get_year_file_paths(folder_path):
-        """Получение названия файлов из определённой папки
+    def __init__(self, report, vacancy_name, charts_dir, image_format, chart_names=None):
+        """Инициализирует один объект класса ImageTask
 
         Args:
-            folder_path (str): Название папки, из которой нужно брать имена файлов
+            report (Report): Отчёт профессии
+            vacancy_name (str): Название профессии
+            charts_dir (str): Папка для файлов графиков
+            image_format (str): Формат файлов графиков: 'png' или 'svg'
+            chart_names (tuple[str] | None): Какие графики рисовать, None - все
+        """
+        self.report = report
+        self.vacancy_name = vacancy_name
+        self.charts_dir = charts_dir
+        self.image_format = image_format
+        self.chart_names = chart_names
+
+    def process(self):
+        """Служит командой, которую нужно будет выполнять процессу Consumer
 
         Returns:
-            list[str]: Названия файлов
+            tuple[str, list[str]]: Название профессии и пути к файлам её графиков
         """
-        return [f"{folder_path}/{file}" for file in listdir(folder_path) if isfile(join(folder_path, file))]
+        return self.vacancy_name, self.report.generate_image(self.vacancy_name, charts_dir=self.charts_dir,
+                                                             image_format=self.image_format,
+                                                             chart_names=self.chart_names)
 
-    def concat_dictionaries_in_tuples(tuples):
-        """Используя группы словарей соединить каждый i-тый словарь
 
-        Args:
-            tuples (list[tuple[dict[int: int], dict[int: int], dict[int: int], dict[int: int]]]): Группы словарей для слияния
+def render_images(reports, consumer_pool, charts_dir='charts', image_format='png'):
+    """Параллельное создание графиков для отчётов нескольких профессий. Графики, данные которых не изменились с
+        прошлого запуска, берутся из charts_dir без перерисовки. Графики по городам одинаковы для всех профессий,
+        поэтому рисуются один раз в этом процессе до раздачи задач, а процессам группы достаются только графики
+        по годам
 
-        Returns:
-            tuple[dict[int: int], dict[int: int], dict[int: int], dict[int: int]]: Словари после слияния
-        """
-        (dict1, dict2, dict3, dict4) = {}, {}, {}, {}
-        for dictionaries in tuples:
-            dict1 = dict1 | dictionaries[0]
-            dict2 = dict2 | dictionaries[1]
-            dict3 = dict3 | dictionaries[2]
-            dict4 = dict4 | dictionaries[3]
-        return dict1, dict2, dict3, dict4
+    Args:
+        reports (dict[str: Report]): Отчёты по названиям профессий
+        consumer_pool (ConsumerPool): Группа процессов для рисования
+        charts_dir (str): Папка для файлов графиков
+        image_format (str): Формат файлов графиков: 'png' или 'svg'
 
+    Returns:
+        dict[str: list[str]]: Пути к файлам графиков по названиям профессий
+    """
+    city_chart_names = ("salary_city_levels", "vacancy_city_count")
+    city_chart_paths = {vacancy_name: report.generate_image(vacancy_name, charts_dir=charts_dir,
+                                                            image_format=image_format, chart_names=city_chart_names)
+                        for (vacancy_name, report) in reports.items()}
+    return {vacancy_name: year_chart_paths + city_chart_paths[vacancy_name]
+            for (vacancy_name, year_chart_paths) in consumer_pool.imap_unordered(
+                ImageTask(report, vacancy_name, charts_dir, image_format, ("salary_year_levels", "vacancy_year_count"))
+                for (vacancy_name, report) in reports.items())}
+
+
+def build_report(input_connect, partial_info):
+    """Составление отчёта по объединённой статистике зарплат
+
+    Args:
+        input_connect (InputConnect): Объект InputConnect для составления статистики по данным
+        partial_info (tuple[dict[int | str: Aggregate], ...]): Статистика в формате InputConnect.partial_info_finder
+
+    Returns:
+        Report: Отчёт
+    """
     def sort_dict_by_key(dictionary):
         """Сортировка словаря лексикографически по ключу
 
@@ -899,6 +2129,21 @@ def get_statistics():
         dict_pairs.sort(key=cmp_to_key(lambda x, y: -1 if x[0] <= y[0] else 1))
         return dict(dict_pairs)
 
+    (year_statistics, city_statistics) = input_connect.partial_info_calculating(partial_info)
+    year_statistics = tuple(sort_dict_by_key(dictionary) for dictionary in year_statistics)
+    return Report(reduce(operator.concat, [year_statistics, city_statistics]))
+
+
+def get_statistics(backend='processes', verbose=False, render_charts=True):
+    """Получение информации с csv файла и создание графиков, таблиц и общего pdf-файл со статистикой
+        на основе вводимых пользователем данных
+
+    Args:
+        backend (str): Способ составления статистики: 'processes' (процессами Consumer в памяти) или 'sql'
+            (запросами GROUP BY к db файлу)
+        verbose (bool): Печатать ли скорость загрузки csv файла в db файл
+        render_charts (bool): Рисовать ли графики; без них выводится только текстовый отчёт
+    """
     input_requests = ["Введите название файла: ", "Введите название профессии: "]
     # input_info = [input(input_request) for input_request in input_requests]
     input_info = ["vacancies_dif_currencies.csv", "Программист"]
@@ -908,47 +2153,86 @@ def get_statistics():
 
     input_connect = InputConnect()
     data_set = DataSet()
+    db_path = 'vacancies.db'
+    db_connect = sqlite3.connect(db_path)
+    consumers_count = max(multiprocessing.cpu_count() - 1, 1)
+    state_db = StatisticsStateConnect(db_connect)
+    source = data_set._get_file_signature(input_info[0])
+    # Статистика, уже посчитанная по этой версии файла, содержит и вакансии, добавленные update_statistics
+    partial_info = state_db.read_state(input_info[1]) if state_db.get_source(input_info[1]) == source else None
+
+    with ConsumerPool(consumers_count) as consumer_pool:
+        if partial_info is None:
+            if not data_set.is_columnar_cache_fresh(db_connect, input_info[0]):
+                data_set.split_csv_by_year(db_connect, input_info[0], consumer_pool=consumer_pool, bulk_load=True,
+                                           columnar_cache=True, verbose=verbose)
+            if backend == 'sql':
+                partial_info = SqlInputConnect().partial_info_finder(db_connect, input_info[1])
+            else:
+                results = sorted(consumer_pool.imap_unordered(
+                    StatisticsTask(db_path, year, input_info[1], data_set, input_connect)
+                    for year in data_set.get_years_from_db(db_connect)), key=lambda result: result[0])
+                partial_info = input_connect.merge_partial_info(partial_info for (_, partial_info) in results)
+            # Время публикации в UTC: из ГГГГ-ММ-ДДTЧЧ:ММ:СС+ЧЧММ в ГГГГ-ММ-ДД ЧЧ:ММ:СС
+            utc_published_at = "datetime(substr(published_at, 1, 22) || ':' || substr(published_at, 23))"
+            last_published_at = db_connect.execute(f"SELECT MAX({utc_published_at}) FROM vacancies;").fetchone()[0]
+            boundary_vacancy_ids = state_db.get_vacancy_ids(
+                (str(year), name, salary, area_name, published_at)
+                for (year, name, salary, area_name, published_at) in db_connect.execute(
+                    "SELECT year, name, salary, area_name, published_at FROM vacancies\n"
+                    f"WHERE {utc_published_at} = ?\nORDER BY year, vacancy_id;", (last_published_at,)))
+            state_db.save_state(input_info[1], partial_info, last_published_at, boundary_vacancy_ids, source)
+        report = build_report(input_connect, partial_info)
+        chart_paths = render_images({input_info[1]: report}, consumer_pool)[input_info[1]] if render_charts else []
+
+    report.print_statistics()
+    # report.generate_excel(input_info[1])
+    # report.generate_pdf(input_info[1], chart_paths)
+
+
+def update_statistics(file_path='vacancies_for_past_day.csv', profession='Программист'):
+    """Добавление вакансий за новый день к статистике, сохранённой в db файле функцией get_statistics, и вывод
+        отчёта. Время работы зависит только от размера нового файла, а не от всей истории. Вакансии, опубликованные
+        раньше последней учтённой, пропускаются; из опубликованных в то же время пропускаются уже учтённые, поэтому
+        повторный запуск с тем же файлом ничего не меняет, а новые вакансии с тем же временем публикации
+        добавляются. Время публикации сравнивается в UTC
+
+    Args:
+        file_path (str): Путь к csv файлу с вакансиями за день
+        profession (str): Название профессии
+    """
+    if stat(file_path).st_size == 0:
+        print("Пустой файл")
+        return
+
+    input_connect = InputConnect()
     db_connect = sqlite3.connect('vacancies.db')
+    state_db = StatisticsStateConnect(db_connect)
+    state = state_db.read_state(profession)
+    if state is None:
+        print("Нет сохранённой статистики, сначала запустите get_statistics")
+        return
 
-    data_set.split_csv_by_year(db_connect, input_info[0])
-    year_file_paths = get_year_file_paths("years")
-
-    tasks = multiprocessing.JoinableQueue()
-    results = multiprocessing.Queue()
-    consumers_count = multiprocessing.cpu_count() - 1
-
-    consumers = [Consumer(tasks, results) for _ in range(consumers_count)]
-    for consumer in consumers:
-        consumer.start()
-    for file_path in year_file_paths:
-        tasks.put(ReadTask(file_path, data_set, input_connect))
-    for _ in range(consumers_count):
-        tasks.put(None)
-    tasks.join()
-    consumers.clear()
-
-    all_vacancies_list = [results.get() for _ in range(len(year_file_paths))]
-    tasks.empty()
-    results.empty()
-
-    tasks = multiprocessing.JoinableQueue()
-    results = multiprocessing.Queue()
-    consumers = [Consumer(tasks, results) for _ in range(consumers_count)]
-    for consumer in consumers:
-        consumer.start()
-    for vacancies_list in all_vacancies_list:
-        tasks.put(CalculateTask(input_info[1], vacancies_list, input_connect))
-    for _ in range(consumers_count):
-        tasks.put(None)
-    tasks.join()
-    consumers.clear()
-
-    all_statistics = concat_dictionaries_in_tuples([results.get() for _ in range(len(year_file_paths))])
-    year_statistics = tuple(sort_dict_by_key(dictionary) for dictionary in all_statistics)
-    city_statistics = input_connect.city_info_finder(reduce(operator.concat, all_vacancies_list))
-    report = Report(reduce(operator.concat, [year_statistics, city_statistics]))
+    last_published_at = state_db.get_last_published_at(profession)
+    boundary_vacancy_ids = state_db.get_boundary_vacancy_ids(profession)
+    vacancies = list(DataSet().get_vacancies_from_csv(db_connect, file_path))
+    vacancy_ids = state_db.get_vacancy_ids((vacancy.published_at, vacancy.name, vacancy.salary, vacancy.area_name,
+                                            published_at) for (vacancy, published_at) in vacancies)
+    (new_last_published_at, new_boundary_vacancy_ids) = (last_published_at, set(boundary_vacancy_ids))
+    new_vacancies = []
+    for ((vacancy, published_at), vacancy_id) in zip(vacancies, vacancy_ids):
+        utc_published_at = state_db.normalize_published_at(published_at)
+        if last_published_at is not None and (utc_published_at < last_published_at or
+                                              utc_published_at == last_published_at and
+                                              vacancy_id in boundary_vacancy_ids):
+            continue
+        new_vacancies.append(vacancy)
+        if new_last_published_at is None or utc_published_at > new_last_published_at:
+            (new_last_published_at, new_boundary_vacancy_ids) = (utc_published_at, set())
+        if utc_published_at == new_last_published_at:
+            new_boundary_vacancy_ids.add(vacancy_id)
+    state = input_connect.merge_partial_info([state, input_connect.partial_info_finder(new_vacancies, profession)])
+    state_db.save_state(profession, state, new_last_published_at, new_boundary_vacancy_ids)
+    report = build_report(input_connect, state)
 
     report.print_statistics()
-    # report.generate_excel(input_info[1])
-    # report.generate_image(input_info[1])
-    # report.generate_pdf(input_info[1])
\ No newline at end of file
@@ -0,0 +1,819 @@
+import csv
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from unittest import mock
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from datetime import datetime, timedelta
+import statistics
+from statistics import CurrencyApiConnect, DataSet, VacancyRow, InputConnect, SqlInputConnect, ConsumerPool, \
+    Aggregate, StatisticsStateConnect, get_statistics, update_statistics, HHruApiConnect, Report, render_images, \
+    ImageTask, ConsumerError
+from currency_rates import CurrencyRates
+
+
+class StubCurrencyServer:
+    """Локальная заглушка api ЦентроБанка, отдающая котировки в формате XML_daily.asp
+
+    Attributes:
+        requests (list[str]): Запрошенные даты
+        fail_first (int): Сколько первых запросов завершить ошибкой 500
+    """
+    def __init__(self, fail_first=0):
+        self.requests = []
+        self.fail_first = fail_first
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                date = parse_qs(urlparse(self.path).query)['date_req'][0]
+                stub.requests.append(date)
+                if len(stub.requests) <= stub.fail_first:
+                    self.send_response(500)
+                    self.end_headers()
+                    return
+                month = int(date[3:5])
+                body = (f'<?xml version="1.0" encoding="windows-1251"?><ValCurs Date="{date}" name="Foreign Currency '
+                        f'Market"><Valute ID="R01235"><NumCode>840</NumCode><CharCode>USD</CharCode><Nominal>1'
+                        f'</Nominal><Name>Доллар США</Name><Value>30,{month:02d}</Value></Valute><Valute ID="R01335">'
+                        f'<NumCode>398</NumCode><CharCode>KZT</CharCode><Nominal>100</Nominal><Name>Тенге</Name>'
+                        f'<Value>20,5</Value></Valute></ValCurs>').encode('windows-1251')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/xml; charset=windows-1251')
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/scripts/XML_daily.asp"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class StubVacanciesServer:
+    """Локальная заглушка метода vacancies api hhru: отдаёт не больше results_cap вакансий по одному запросу
+
+    Attributes:
+        vacancies (list[dict]): Вакансии, которые отдаёт заглушка
+        requests (list[dict[str: str]]): Параметры запросов
+    """
+    def __init__(self, vacancies, results_cap=2000, fail_after=None):
+        self.vacancies = vacancies
+        self.requests = []
+        self.fail_after = fail_after
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                params = {key: value[0] for (key, value) in parse_qs(urlparse(self.path).query).items()}
+                stub.requests.append(params)
+                if stub.fail_after is not None and len(stub.requests) > stub.fail_after:
+                    self.send_response(500)
+                    self.end_headers()
+                    return
+                (page, per_page) = (int(params['page']), int(params['per_page']))
+                found = [vacancy for vacancy in stub.vacancies
+                         if params['date_from'] <= vacancy['published_at'][:19] <= params['date_to']]
+                if (page + 1) * per_page > results_cap:
+                    self.send_response(400)
+                    self.end_headers()
+                    return
+                body = json.dumps({'items': found[page * per_page:(page + 1) * per_page], 'found': len(found),
+                                   'pages': min(-(-len(found) // per_page), results_cap // per_page),
+                                   'page': page, 'per_page': per_page}).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/vacancies"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class CurrencyApiConnectTests(unittest.TestCase):
+    def setUp(self):
+        self.db_connect = sqlite3.connect(':memory:')
+
+    def tearDown(self):
+        self.db_connect.close()
+
+    def test_quotes_values(self):
+        server = StubCurrencyServer()
+        currency_db = CurrencyApiConnect(self.db_connect, url=server.url)
+        quotes = currency_db.get_currency_quotes(('2003', '2003'))
+        server.close()
+        self.assertEqual(len(quotes), 12)
+        self.assertEqual(len(server.requests), 12)
+        self.assertAlmostEqual(quotes['2003-07']['USD'], 30.07)
+        self.assertAlmostEqual(quotes['2003-07']['KZT'], 0.205)
+
+    def test_only_missing_months_fetched(self):
+        server = StubCurrencyServer()
+        currency_db = CurrencyApiConnect(self.db_connect, url=server.url)
+        currency_db.save_currency_quotes_in_db(currency_db.get_currency_quotes(('2003', '2003')), ['USD', 'RUR', 'KZT'])
+        quotes = currency_db.get_currency_quotes(('2003', '2004'))
+        server.close()
+        self.assertEqual(sorted(quotes), ["2003-12"] + [f"2004-{month:02d}" for month in range(1, 13)])
+        self.assertEqual(len(server.requests), 25)
+
+    def test_repeated_save_upserts(self):
+        currency_db = CurrencyApiConnect(self.db_connect)
+        currency_db.save_currency_quotes_in_db({"2003-01": {"USD": 30.0}, "2003-02": {"USD": 31.0}}, ['USD', 'RUR'])
+        currency_db.save_currency_quotes_in_db({"2003-02": {"USD": 32.0}, "2003-03": {"USD": 33.0}}, ['USD', 'RUR'])
+        self.assertEqual(currency_db.read_currency_quotes_from_db(['USD', 'RUR']),
+                         {"2003-01": {"USD": 30.0, "RUR": 1}, "2003-02": {"USD": 32.0, "RUR": 1},
+                          "2003-03": {"USD": 33.0, "RUR": 1}})
+        self.assertEqual(currency_db._get_high_water_mark(), "2003-03")
+
+    def test_high_water_mark_does_not_go_back(self):
+        currency_db = CurrencyApiConnect(self.db_connect)
+        currency_db.save_currency_quotes_in_db({"2004-05": {"USD": 30.0}}, ['USD', 'RUR'])
+        currency_db.save_currency_quotes_in_db({"2003-01": {"USD": 31.0}}, ['USD', 'RUR'])
+        self.assertEqual(currency_db._get_high_water_mark(), "2004-05")
+
+    def test_daily_run_fetches_newest_month(self):
+        server = StubCurrencyServer()
+        currency_db = CurrencyApiConnect(self.db_connect, url=server.url)
+        currency_db.save_currency_quotes_in_db(currency_db.get_currency_quotes(('2003', '2003')), ['USD', 'RUR', 'KZT'])
+        quotes = currency_db.get_currency_quotes(('2003', '2003'))
+        server.close()
+        self.assertEqual(list(quotes), ["2003-12"])
+
+    def test_high_water_mark_skips_months_without_quotes(self):
+        currency_db = CurrencyApiConnect(self.db_connect)
+        currency_db.save_currency_quotes_in_db({"2004-04": {"USD": 30.0}, "2004-05": {}}, ['USD', 'RUR'])
+        self.assertEqual(currency_db._get_high_water_mark(), "2004-04")
+
+    def test_cache_across_month_boundary(self):
+        class FixedDatetime(datetime):
+            @classmethod
+            def now(cls, tz=None):
+                return cls(*today)
+
+        server = StubCurrencyServer()
+        currency_db = CurrencyApiConnect(self.db_connect, url=server.url)
+        with mock.patch.object(statistics, 'datetime', FixedDatetime):
+            today = (2004, 3, 31)
+            quotes = currency_db.get_currency_quotes(('2003', '2004'))
+            currency_db.save_currency_quotes_in_db(quotes, ['USD', 'RUR', 'KZT'])
+            self.assertEqual(max(quotes), "2004-03")
+            self.assertEqual(len(quotes), 15)
+            self.assertEqual(currency_db._get_high_water_mark(), "2004-03")
+            today = (2004, 4, 1)
+            quotes = currency_db.get_currency_quotes(('2003', '2004'))
+            currency_db.save_currency_quotes_in_db(quotes, ['USD', 'RUR', 'KZT'])
+        server.close()
+        self.assertEqual(sorted(quotes), ["2004-03", "2004-04"])
+        self.assertEqual(currency_db._get_high_water_mark(), "2004-04")
+        self.assertEqual(len(server.requests), 17)
+
+    def test_retry_after_server_error(self):
+        server = StubCurrencyServer(fail_first=2)
+        currency_db = CurrencyApiConnect(self.db_connect, url=server.url, max_workers=1, backoff=0)
+        quotes = currency_db.get_currency_quotes(('2005', '2005'))
+        server.close()
+        self.assertEqual(len(quotes), 12)
+        self.assertEqual(len(server.requests), 14)
+
+
+class ConvertVacancyInfoTests(unittest.TestCase):
+    data_set = DataSet()
+    currencies = ['USD', 'RUR', 'EUR']
+    quotes = {"2003-01": {"USD": 31.5, "RUR": 1, "EUR": None}, "2004-02": {"USD": 29.0, "RUR": 1, "EUR": 35.25}}
+    rows = [["Программист", "1000", "2000.0", "USD", "Москва", "2003-01-10T10:00:00+0300"],
+            ["Аналитик", "1500.5", "", "EUR", "Казань", "2003-01-11T10:00:00+0300"],
+            ["Тестировщик", "", "", "RUR", "Москва", "2003-01-12T10:00:00+0300"],
+            ["Менеджер", "30000", "50000", "KZT", "Алматы", "2004-02-01T10:00:00+0300"],
+            ["", "30000", "50000", "RUR", "Москва", "2004-02-01T10:00:00+0300"],
+            ["Бухгалтер", "30000", "", "RUR", "", "2004-02-01T10:00:00+0300"],
+            ["Программист 1С", "", "40000", "RUR", "Пермь", "2004-02-03T10:00:00+0300"],
+            ["Программист Python", "900", "1100", "EUR", "Москва", "2004-02-04T10:00:00+0300"]]
+
+    def test_python_engine(self):
+        self.assertEqual(self.data_set._convert_vacancy_info(self.rows, self.currencies, CurrencyRates(self.quotes)),
+                         {"2003": [("Программист", 31.5 * 3000 / 2, "Москва", "2003-01-10T10:00:00+0300"),
+                                   ("Аналитик", 59.90 * 1500 / 2, "Казань", "2003-01-11T10:00:00+0300")],
+                          "2004": [("Программист 1С", 20000.0, "Пермь", "2004-02-03T10:00:00+0300"),
+                                   ("Программист Python", 35250.0, "Москва", "2004-02-04T10:00:00+0300")]})
+
+    def test_numpy_engine_matches_python_engine(self):
+        rate_matrix = self.data_set._get_rate_matrix(self.currencies, self.quotes)
+        self.assertEqual(self.data_set._convert_vacancy_info_vectorized(self.rows, self.currencies, rate_matrix),
+                         self.data_set._convert_vacancy_info(self.rows, self.currencies, CurrencyRates(self.quotes)))
+
+    def test_numpy_engine_empty_chunk(self):
+        rate_matrix = self.data_set._get_rate_matrix(self.currencies, self.quotes)
+        self.assertEqual(self.data_set._convert_vacancy_info_vectorized(self.rows[4:6], self.currencies, rate_matrix),
+                         {})
+
+
+class ReadDbTests(unittest.TestCase):
+    data_set = DataSet()
+
+    def setUp(self):
+        (handle, self.db_path) = tempfile.mkstemp(suffix='.db')
+        os.close(handle)
+        db_connect = sqlite3.connect(self.db_path)
+        self.data_set._create_years_db(db_connect, [
+            {"2003": [("Программист", 100.0, "Москва", "2003-01-10T10:00:00+0300"),
+                      ("Аналитик", 200.0, "Казань", "2003-02-10T10:00:00+0300")],
+             "2004": [("Менеджер", 300.0, "Пермь", "2004-03-10T10:00:00+0300")]},
+            {"2003": [("Тестировщик", 400.0, "Москва", "2003-04-10T10:00:00+0300")]}])
+        db_connect.close()
+
+    def tearDown(self):
+        os.remove(self.db_path)
+
+    def test_years(self):
+        db_connect = sqlite3.connect(self.db_path)
+        self.assertEqual(self.data_set.get_years_from_db(db_connect), ["2003", "2004"])
+        db_connect.close()
+
+    def test_read_in_batches(self):
+        self.assertEqual(list(self.data_set._read_db(self.db_path, "2003", batch_size=2)),
+                         [VacancyRow("Программист", 100.0, "Москва", "2003"),
+                          VacancyRow("Аналитик", 200.0, "Казань", "2003"),
+                          VacancyRow("Тестировщик", 400.0, "Москва", "2003")])
+
+    def test_repeated_strings_are_shared(self):
+        rows = list(self.data_set._read_db(self.db_path, "2003", batch_size=2))
+        self.assertIs(rows[0].area_name, rows[2].area_name)
+        self.assertIs(rows[0].published_at, rows[2].published_at)
+
+    def test_reingest_replaces_year(self):
+        db_connect = sqlite3.connect(self.db_path)
+        self.data_set._create_years_db(db_connect, [
+            {"2003": [("Дизайнер", 500.0, "Пермь", "2003-05-10T10:00:00+0300")]}], keep_other_years=True)
+        db_connect.close()
+        self.assertEqual(list(self.data_set._read_db(self.db_path, "2003")),
+                         [VacancyRow("Дизайнер", 500.0, "Пермь", "2003")])
+        self.assertEqual(list(self.data_set._read_db(self.db_path, "2004")),
+                         [VacancyRow("Менеджер", 300.0, "Пермь", "2004")])
+
+    def test_reload_drops_missing_years(self):
+        db_connect = sqlite3.connect(self.db_path)
+        self.data_set._create_years_db(db_connect, [
+            {"2003": [("Дизайнер", 500.0, "Пермь", "2003-05-10T10:00:00+0300")]}])
+        self.assertEqual(self.data_set.get_years_from_db(db_connect), ["2003"])
+        db_connect.close()
+        self.assertEqual(list(self.data_set._read_db(self.db_path, "2003")),
+                         [VacancyRow("Дизайнер", 500.0, "Пермь", "2003")])
+
+    def test_bulk_load_matches_normal_load(self):
+        def schema_and_rows(db_connect):
+            return (db_connect.execute("SELECT type, name, sql FROM sqlite_master WHERE name LIKE 'vacancies%' "
+                                       "ORDER BY name;").fetchall(),
+                    db_connect.execute("SELECT * FROM vacancies ORDER BY year, vacancy_id;").fetchall())
+
+        chunks = [{"2003": [("Дизайнер", 500.0, "Пермь", "2003-05-10T10:00:00+0300")],
+                   "2005": [("Менеджер", 300.0, "Москва", "2005-03-10T10:00:00+0300")]}]
+        (handle, bulk_db_path) = tempfile.mkstemp(suffix='.db')
+        os.close(handle)
+        normal_connect = sqlite3.connect(self.db_path)
+        bulk_connect = sqlite3.connect(bulk_db_path)
+        self.data_set._create_years_db(normal_connect, chunks)
+        self.data_set._create_years_db(bulk_connect, chunks, bulk_load=True)
+        self.assertEqual(schema_and_rows(bulk_connect), schema_and_rows(normal_connect))
+        self.assertEqual(bulk_connect.execute("PRAGMA journal_mode;").fetchone()[0], "delete")
+        normal_connect.close()
+        bulk_connect.close()
+        os.remove(bulk_db_path)
+
+    def test_bulk_load_restores_indexes_on_error(self):
+        def failing_chunks():
+            yield {"2003": [("Дизайнер", 500.0, "Пермь", "2003-05-10T10:00:00+0300")]}
+            raise ValueError("ошибка чтения")
+
+        db_connect = sqlite3.connect(self.db_path)
+        with self.assertRaises(ValueError):
+            self.data_set._create_years_db(db_connect, failing_chunks(), bulk_load=True)
+        self.assertEqual([row[0] for row in db_connect.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL ORDER BY name;")],
+            ["vacancies_area_name", "vacancies_year_name"])
+        self.assertEqual(db_connect.execute("PRAGMA journal_mode;").fetchone()[0], "delete")
+        self.assertEqual(db_connect.execute("PRAGMA synchronous;").fetchone()[0], 2)
+        db_connect.close()
+
+    def test_without_rowid(self):
+        db_connect = sqlite3.connect(':memory:')
+        self.data_set._create_years_db(db_connect, [
+            {"2003": [("Дизайнер", 500.0, "Пермь", "2003-05-10T10:00:00+0300")]}], without_rowid=True)
+        self.assertIn("WITHOUT ROWID", db_connect.execute(
+            "SELECT sql FROM sqlite_master WHERE name = 'vacancies';").fetchone()[0])
+        db_connect.close()
+
+
+@unittest.skipIf(statistics.feather is None, "pyarrow не установлен")
+class ColumnarCacheTests(unittest.TestCase):
+    data_set = DataSet()
+
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.folder = tempfile.TemporaryDirectory()
+        os.chdir(self.folder.name)
+        self.db_connect = sqlite3.connect('vacancies.db')
+        self.data_set._create_years_db(self.db_connect, [
+            {"2003": [("Программист", 100.0, "Москва", "2003-01-10T10:00:00+0300"),
+                      ("Аналитик", 200.0, "Казань", "2003-02-10T10:00:00+0300")],
+             "2004": [("Менеджер", 300.0, "Пермь", "2004-03-10T10:00:00+0300")]}])
+        with open('vacancies.csv', mode='w', encoding='utf-8') as file:
+            file.write("name,salary_from,salary_to,salary_currency,area_name,published_at\n")
+
+    def tearDown(self):
+        self.db_connect.close()
+        os.chdir(self.cwd)
+        self.folder.cleanup()
+
+    def test_feather_matches_db(self):
+        self.data_set._create_years_feather(self.db_connect)
+        self.data_set._set_columnar_cache_source(self.db_connect, 'vacancies.csv')
+        for year in ("2003", "2004"):
+            self.assertTrue(os.path.isfile(f"years/{year}.feather"))
+            self.assertEqual(list(self.data_set._read_year('vacancies.db', year)),
+                             list(self.data_set._read_db('vacancies.db', year)))
+
+    def test_stale_feather_is_not_read(self):
+        self.data_set._create_years_feather(self.db_connect)
+        self.data_set._set_columnar_cache_source(self.db_connect, 'vacancies.csv')
+        self.data_set._create_years_db(self.db_connect, [
+            {"2003": [("Дизайнер", 500.0, "Пермь", "2003-05-10T10:00:00+0300")]}])
+        self.assertTrue(os.path.isfile("years/2003.feather"))
+        self.assertEqual(list(self.data_set._read_year('vacancies.db', "2003")),
+                         [VacancyRow("Дизайнер", 500.0, "Пермь", "2003")])
+
+    def test_cache_freshness(self):
+        self.assertFalse(self.data_set.is_columnar_cache_fresh(self.db_connect, 'vacancies.csv'))
+        self.data_set._set_columnar_cache_source(self.db_connect, 'vacancies.csv')
+        self.assertTrue(self.data_set.is_columnar_cache_fresh(self.db_connect, 'vacancies.csv'))
+        with open('vacancies.csv', mode='a', encoding='utf-8') as file:
+            file.write("Программист,100,200,RUR,Москва,2003-01-10T10:00:00+0300\n")
+        self.assertFalse(self.data_set.is_columnar_cache_fresh(self.db_connect, 'vacancies.csv'))
+
+
+class SplitCsvTests(unittest.TestCase):
+    data_set = DataSet()
+
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.folder = tempfile.TemporaryDirectory()
+        os.chdir(self.folder.name)
+        rows = [["name", "salary_from", "salary_to", "salary_currency", "area_name", "published_at"]]
+        for i in range(40):
+            rows.append([f"Программист\n{i}" if i % 3 == 0 else f"Аналитик {i}", str(100 * (i + 1)), str(200 * (i + 1)),
+                         "RUR", "Москва" if i % 2 else "Пермь", f"{2003 + i % 3}-0{1 + i % 9}-10T10:00:00+0300"])
+        rows.append(["Без оклада", "", "", "", "Москва", "2004-01-10T10:00:00+0300"])
+        self.lines = [",".join(f'"{value}"' if "\n" in value else value for value in row) for row in rows]
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.folder.cleanup()
+
+    def split(self, file_path, consumer_pool=None):
+        db_connect = sqlite3.connect(':memory:')
+        with mock.patch.object(CurrencyApiConnect, 'get_currency_quotes', return_value={}):
+            self.data_set.split_csv_by_year(db_connect, file_path, chunk_size=7, consumer_pool=consumer_pool,
+                                            range_size=64)
+        rows = sorted(db_connect.execute("SELECT name, salary, area_name, published_at FROM vacancies;"))
+        db_connect.close()
+        return rows
+
+    def check_newline(self, newline):
+        with open('vacancies.csv', mode='w', encoding='utf-8', newline='') as file:
+            file.write(newline.join(line.replace("\n", newline) for line in self.lines) + newline)
+        self.assertEqual(self.data_set._get_year_borders('vacancies.csv'), ("2003", "2005"))
+        sequential_rows = self.split('vacancies.csv')
+        with ConsumerPool(2) as consumer_pool:
+            parallel_rows = self.split('vacancies.csv', consumer_pool)
+        self.assertEqual(len(sequential_rows), 40)
+        self.assertIn("Программист\n0", [row[0] for row in sequential_rows])
+        self.assertEqual(parallel_rows, sequential_rows)
+
+    def test_verbose_reports_load_speed(self):
+        with open('vacancies.csv', mode='w', encoding='utf-8') as file:
+            file.write("\n".join(self.lines) + "\n")
+        db_connect = sqlite3.connect(':memory:')
+        with mock.patch.object(CurrencyApiConnect, 'get_currency_quotes', return_value={}), \
+                redirect_stdout(StringIO()) as output:
+            self.data_set.split_csv_by_year(db_connect, 'vacancies.csv', bulk_load=True, verbose=True)
+        db_connect.close()
+        self.assertRegex(output.getvalue(), r"^Загружено строк: 40 за \d+\.\d\d с \(\d+ строк/с\)\n$")
+
+    def test_parallel_matches_sequential_lf(self):
+        self.check_newline("\n")
+
+    def test_parallel_matches_sequential_crlf(self):
+        self.check_newline("\r\n")
+
+    def test_parallel_matches_sequential_cr(self):
+        self.check_newline("\r")
+
+
+class SqlInputConnectTests(unittest.TestCase):
+    data_set = DataSet()
+    rows = {"2003": [("Программист", 100.5, "Москва", "2003-01-10T10:00:00+0300"),
+                     ("Аналитик", 200.0, "Казань", "2003-02-10T10:00:00+0300"),
+                     ("Программист 1С", 150.0, "Казань", "2003-02-11T10:00:00+0300")],
+            "2004": [("Менеджер", 300.0, "Пермь", "2004-03-10T10:00:00+0300"),
+                     ("программист", 310.0, "Москва", "2004-03-11T10:00:00+0300")],
+            "2005": [("Junior Программист", 420.25, "Пермь", "2005-03-10T10:00:00+0300")]}
+
+    def setUp(self):
+        (handle, self.db_path) = tempfile.mkstemp(suffix='.db')
+        os.close(handle)
+        self.db_connect = sqlite3.connect(self.db_path)
+        self.data_set._create_years_db(self.db_connect, [self.rows])
+        self.years = self.data_set.get_years_from_db(self.db_connect)
+
+    def tearDown(self):
+        self.db_connect.close()
+        os.remove(self.db_path)
+
+    def test_year_info_matches_in_memory(self):
+        input_connect = InputConnect()
+        expected = [{}, {}, {}, {}]
+        for year in self.years:
+            for (dictionary, year_dictionary) in zip(expected, input_connect.year_info_finder(
+                    self.data_set.get_vacancies_from_file(self.db_path, year), "Программист")):
+                dictionary.update(year_dictionary)
+        self.assertEqual(SqlInputConnect().year_info_finder(self.db_connect, "Программист"),
+                         tuple(expected))
+
+    def test_city_info_matches_in_memory(self):
+        vacancies = [vacancy for year in self.years for vacancy in
+                     self.data_set.get_vacancies_from_file(self.db_path, year)]
+        self.assertEqual(SqlInputConnect().city_info_finder(self.db_connect),
+                         InputConnect().city_info_finder(vacancies))
+
+
+class PartialInfoTests(unittest.TestCase):
+    vacancies = [VacancyRow("Программист", 100.5, "Москва", "2003"), VacancyRow("Аналитик", 200.0, "Казань", "2003"),
+                 VacancyRow("Программист 1С", 150.0, "Казань", "2003"), VacancyRow("Менеджер", 300.0, "Пермь", "2004"),
+                 VacancyRow("Программист", 310.0, "Москва", "2004"), VacancyRow("Тестировщик", 420.0, "Пермь", "2005")]
+
+    def test_merge_of_chunks_matches_whole(self):
+        input_connect = InputConnect()
+        whole = input_connect.partial_info_finder(self.vacancies, "Программист")
+        for size in range(1, len(self.vacancies)):
+            chunks = [self.vacancies[i:i + size] for i in range(0, len(self.vacancies), size)]
+            self.assertEqual(input_connect.merge_partial_info(
+                input_connect.partial_info_finder(chunk, "Программист") for chunk in chunks), whole)
+
+    def test_aggregate_merge(self):
+        (first, second) = (Aggregate(), Aggregate())
+        for value in (3.0, 1.0):
+            first.add(value)
+        second.add(5.0)
+        self.assertEqual(first.merge(second), Aggregate(9.0, 3, 1.0, 5.0, 35.0))
+        self.assertEqual(first.merge(Aggregate()), Aggregate(9.0, 3, 1.0, 5.0, 35.0))
+        self.assertEqual(first.mean(), 3)
+        self.assertEqual(Aggregate().mean(), 0)
+
+    def test_calculating_matches_finders(self):
+        input_connect = InputConnect()
+        self.assertEqual(input_connect.partial_info_calculating(
+            input_connect.partial_info_finder(self.vacancies, "Программист")),
+            (input_connect.year_info_finder(self.vacancies, "Программист"),
+             input_connect.city_info_finder(self.vacancies)))
+
+
+class UpdateStatisticsTests(unittest.TestCase):
+    old_vacancies = [VacancyRow("Программист", 100.0, "Москва", "2022"), VacancyRow("Аналитик", 200.0, "Казань", "2022")]
+    new_vacancies = [VacancyRow("Дизайнер", 90.0, "Пермь", "2022"), VacancyRow("Разработчик", 120.0, "Москва", "2022"),
+                     VacancyRow("Программист 1С", 60.66 * 150, "Пермь", "2022"),
+                     VacancyRow("Тестировщик", 150.0, "Москва", "2022")]
+
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.folder = tempfile.TemporaryDirectory()
+        os.chdir(self.folder.name)
+        db_connect = sqlite3.connect('vacancies.db')
+        CurrencyApiConnect(db_connect).save_currency_quotes_in_db({"2022-12": {}}, DataSet.popular_currencies)
+        StatisticsStateConnect(db_connect).save_state(
+            "Программист", InputConnect().partial_info_finder(self.old_vacancies, "Программист"),
+            "2022-12-20 07:00:00", StatisticsStateConnect.get_vacancy_ids(
+                [("2022", "Аналитик", 200.0, "Казань", "2022-12-20T10:00:00+0300")]))
+        db_connect.close()
+        with open('vacancies_for_past_day.csv', mode='w', encoding='utf-8') as file:
+            file.write("name,salary_from,salary_to,salary_currency,area_name,published_at\r"
+                       "Менеджер,80,80,RUR,Тула,2022-12-20T10:30:00+0400\r"
+                       "Аналитик,200,200,RUR,Казань,2022-12-20T10:00:00+0300\r"
+                       "Дизайнер,90,90,RUR,Пермь,2022-12-20T11:00:00+0400\r"
+                       "Разработчик,120,120,RUR,Москва,2022-12-20T18:00:00+0300\r"
+                       "Программист 1С,100,200,USD,Пермь,2022-12-21T10:00:00+0300\r"
+                       "Тестировщик,300,,RUR,Москва,2022-12-21T11:00:00+0300\r")
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.folder.cleanup()
+
+    def read_state(self):
+        db_connect = sqlite3.connect('vacancies.db')
+        state_db = StatisticsStateConnect(db_connect)
+        (state, last_published_at) = (state_db.read_state("Программист"),
+                                      state_db.get_last_published_at("Программист"))
+        db_connect.close()
+        return state, last_published_at
+
+    def test_new_day_folded_once(self):
+        input_connect = InputConnect()
+        expected = input_connect.merge_partial_info(
+            [input_connect.partial_info_finder(self.old_vacancies, "Программист"),
+             input_connect.partial_info_finder(self.new_vacancies, "Программист")])
+        with mock.patch.object(CurrencyApiConnect, 'get_currency_quotes', return_value={}), \
+                redirect_stdout(StringIO()):
+            update_statistics()
+            self.assertEqual(self.read_state(), (expected, "2022-12-21 08:00:00"))
+            update_statistics()
+            self.assertEqual(self.read_state(), (expected, "2022-12-21 08:00:00"))
+
+    def test_same_time_as_last_vacancy(self):
+        with open('vacancies_for_past_day.csv', mode='w', encoding='utf-8') as file:
+            file.write("name,salary_from,salary_to,salary_currency,area_name,published_at\n"
+                       "Тестировщик,300,,RUR,Москва,2022-12-21T11:00:00+0300\n")
+        with mock.patch.object(CurrencyApiConnect, 'get_currency_quotes', return_value={}), \
+                redirect_stdout(StringIO()):
+            update_statistics()
+            with open('vacancies_for_past_day.csv', mode='a', encoding='utf-8') as file:
+                file.write("Тестировщик,300,,RUR,Москва,2022-12-21T11:00:00+0300\n"
+                           "Программист,400,,RUR,Москва,2022-12-21T12:00:00+0400\n")
+            update_statistics()
+        input_connect = InputConnect()
+        self.assertEqual(self.read_state(), (input_connect.merge_partial_info(
+            [input_connect.partial_info_finder(self.old_vacancies, "Программист"),
+             input_connect.partial_info_finder([VacancyRow("Тестировщик", 150.0, "Москва", "2022"),
+                                                VacancyRow("Тестировщик", 150.0, "Москва", "2022"),
+                                                VacancyRow("Программист", 200.0, "Москва", "2022")],
+                                               "Программист")]), "2022-12-21 08:00:00"))
+
+    def test_get_statistics_keeps_new_days(self):
+        with open('vacancies_dif_currencies.csv', mode='w', encoding='utf-8') as file:
+            file.write("name,salary_from,salary_to,salary_currency,area_name,published_at\n"
+                       "Программист,100,100,RUR,Москва,2022-12-19T10:00:00+0300\n"
+                       "Аналитик,200,200,RUR,Казань,2022-12-20T10:00:00+0300\n")
+        with mock.patch.object(CurrencyApiConnect, 'get_currency_quotes', return_value={}), \
+                redirect_stdout(StringIO()):
+            get_statistics('sql')
+            self.assertEqual(self.read_state()[1], "2022-12-20 07:00:00")
+            update_statistics()
+            updated_state = self.read_state()
+            get_statistics('sql')
+        self.assertEqual(updated_state[1], "2022-12-21 08:00:00")
+        self.assertEqual(updated_state[0][0][2022].count, 6)
+        self.assertEqual(self.read_state(), updated_state)
+        self.assertTrue(os.listdir('charts'))
+
+    def test_get_statistics_without_charts(self):
+        with open('vacancies_dif_currencies.csv', mode='w', encoding='utf-8') as file:
+            file.write("name,salary_from,salary_to,salary_currency,area_name,published_at\n"
+                       "Программист,100,100,RUR,Москва,2022-12-19T10:00:00+0300\n")
+        output = StringIO()
+        with mock.patch.object(CurrencyApiConnect, 'get_currency_quotes', return_value={}), redirect_stdout(output):
+            get_statistics('sql', render_charts=False)
+        self.assertIn("Динамика уровня зарплат по годам", output.getvalue())
+        self.assertFalse(os.path.exists('charts'))
+
+
+class HHruApiConnectTests(unittest.TestCase):
+    day = datetime(2022, 12, 20)
+
+    def setUp(self):
+        (handle, self.file_path) = tempfile.mkstemp(suffix='.csv')
+        os.close(handle)
+
+    def tearDown(self):
+        os.remove(self.file_path)
+
+    def make_vacancies(self, count):
+        return [{'id': str(i), 'name': f"Вакансия {i}", 'salary': {'from': 1000 + i, 'to': None, 'currency': 'RUR'},
+                 'area': {'name': "Москва"},
+                 'published_at': (self.day + timedelta(seconds=i * 86399 // count)).strftime('%Y-%m-%dT%H:%M:%S+0300')}
+                for i in range(count)]
+
+    def harvest(self, server, db_connect=None):
+        HHruApiConnect(url=server.url, rate=1000, per_page=10, results_cap=100, retries=0,
+                       db_connect=db_connect).save_vacancy_data(
+            self.day, self.day + timedelta(hours=23, minutes=59, seconds=59), self.file_path)
+        with open(self.file_path, encoding='utf-8', newline='') as file:
+            return list(csv.reader(file, lineterminator='\r'))
+
+    def test_small_day_stops_at_last_page(self):
+        server = StubVacanciesServer(self.make_vacancies(35), results_cap=100)
+        rows = self.harvest(server)
+        server.close()
+        self.assertEqual(len(rows), 36)
+        self.assertEqual(sorted(int(request['page']) for request in server.requests), [0, 1, 2, 3])
+
+    def test_window_split_over_results_cap(self):
+        vacancies = self.make_vacancies(450)
+        vacancies.append(dict(vacancies[0], id="boundary", published_at="2022-12-20T11:59:59+0300"))
+        server = StubVacanciesServer(vacancies, results_cap=100)
+        rows = self.harvest(server)
+        server.close()
+        self.assertEqual(rows[0], ['name', 'salary_from', 'salary_to', 'salary_currency', 'area_name', 'published_at'])
+        self.assertEqual(sorted(rows[1:]), sorted([vacancy['name'], str(vacancy['salary']['from']), '', 'RUR', "Москва",
+                                                   vacancy['published_at']] for vacancy in vacancies))
+
+    def test_resume_after_failure(self):
+        vacancies = self.make_vacancies(250)
+        db_connect = sqlite3.connect(':memory:')
+        server = StubVacanciesServer(vacancies, results_cap=100, fail_after=12)
+        with self.assertRaises(Exception):
+            self.harvest(server, db_connect)
+        server.close()
+        server = StubVacanciesServer(vacancies, results_cap=100)
+        rows = self.harvest(server, db_connect)
+        server.close()
+        self.assertLess(len(server.requests), 31)
+        self.assertEqual(sorted(row[0] for row in rows[1:]), sorted(vacancy['name'] for vacancy in vacancies))
+        server = StubVacanciesServer(vacancies, results_cap=100)
+        self.assertEqual(self.harvest(server, db_connect), rows)
+        server.close()
+        self.assertEqual(server.requests, [])
+        db_connect.close()
+
+
+class SquareTask:
+    def __init__(self, number):
+        self.number = number
+
+    def process(self):
+        return self.number ** 2
+
+
+class BigResultTask:
+    def process(self):
+        return "x" * (1 << 20)
+
+
+class UnpicklableError(Exception):
+    def __init__(self):
+        super().__init__("не передаётся между процессами")
+        self.callback = lambda: None
+
+
+class UnpicklableErrorTask:
+    def process(self):
+        raise UnpicklableError()
+
+
+class ConsumerPoolTests(unittest.TestCase):
+    def test_pool_reused_between_stages(self):
+        with ConsumerPool(2) as consumer_pool:
+            self.assertEqual(sorted(consumer_pool.imap_unordered(SquareTask(i) for i in range(10))),
+                             [i ** 2 for i in range(10)])
+            self.assertEqual(sorted(consumer_pool.imap_unordered([SquareTask(3), SquareTask(4)])), [9, 16])
+
+    def test_task_error_is_raised(self):
+        with ConsumerPool(2) as consumer_pool:
+            with self.assertRaises(ConsumerError) as context:
+                list(consumer_pool.imap_unordered(SquareTask(i if i != 5 else "5") for i in range(10)))
+            self.assertEqual(context.exception.type_name, "TypeError")
+            self.assertIn("self.number ** 2", context.exception.traceback_text)
+            self.assertEqual(sorted(consumer_pool.imap_unordered([SquareTask(3), SquareTask(4)])), [9, 16])
+
+    def test_unpicklable_task_error_is_raised(self):
+        with ConsumerPool(2) as consumer_pool:
+            with self.assertRaises(ConsumerError) as context:
+                list(consumer_pool.imap_unordered([UnpicklableErrorTask()]))
+        self.assertEqual(context.exception.type_name, "UnpicklableError")
+        self.assertEqual(context.exception.message, "не передаётся между процессами")
+
+    def test_stopped_reading_does_not_hang(self):
+        with ConsumerPool(2) as consumer_pool:
+            for _ in consumer_pool.imap_unordered(BigResultTask() for _ in range(8)):
+                break
+            self.assertEqual(sorted(consumer_pool.imap_unordered([SquareTask(3), SquareTask(4)])), [9, 16])
+            results = consumer_pool.imap_unordered(BigResultTask() for _ in range(8))
+            next(results)
+        self.assertTrue(all(not consumer.is_alive() for consumer in consumer_pool.consumers))
+
+    def test_caller_error_reaches_caller(self):
+        with self.assertRaises(ValueError):
+            with ConsumerPool(2) as consumer_pool:
+                for _ in consumer_pool.imap_unordered(BigResultTask() for _ in range(8)):
+                    raise ValueError("ошибка обработки результата")
+        self.assertTrue(all(not consumer.is_alive() for consumer in consumer_pool.consumers))
+
+    def split_with_pool(self, rows):
+        cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as folder:
+            os.chdir(folder)
+            with open("vacancies.csv", mode='w', encoding='utf-8') as file:
+                file.write("name,salary_from,salary_to,salary_currency,area_name,published_at\n" + rows)
+            db_connect = sqlite3.connect(':memory:')
+            try:
+                with ConsumerPool(3) as consumer_pool, \
+                        mock.patch.object(CurrencyApiConnect, 'get_currency_quotes', return_value={}):
+                    DataSet().split_csv_by_year(db_connect, "vacancies.csv", consumer_pool=consumer_pool,
+                                                range_size=4096)
+            finally:
+                db_connect.close()
+                os.chdir(cwd)
+
+    def test_split_task_error_is_raised(self):
+        with self.assertRaises(ConsumerError) as context:
+            self.split_with_pool("Программист,abc,200,RUR,Москва,2003-01-10T10:00:00+0300\n")
+        self.assertEqual(context.exception.type_name, "ValueError")
+
+    def test_split_result_error_is_raised(self):
+        rows = "Программист,100,200,RUR,Москва,2003-01-10T10:00:00+0300\n" * 5000
+        with self.assertRaises(ValueError):
+            self.split_with_pool(rows + "Программист,100,200,RUR,Москва,20x3-01-10T10:00:00+0300\n" + rows)
+
+
+class ReportImageTests(unittest.TestCase):
+    def setUp(self):
+        self.charts_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.charts_dir)
+
+    @staticmethod
+    def make_report(selected_count):
+        return Report(({2003: 100, 2004: 200}, {2003: 10, 2004: 20}, {2003: 150, 2004: 250},
+                       {2003: selected_count, 2004: 5}, {"Москва": 300, "Пермь": 100},
+                       {"Москва": "60.0%", "Пермь": "30.0%"}))
+
+    def test_combined_image(self):
+        file_name = os.path.join(self.charts_dir, "graph.png")
+        self.assertEqual(self.make_report(3).generate_image("Программист", file_name), [file_name])
+        self.assertTrue(os.path.getsize(file_name) > 0)
+
+    def test_unchanged_charts_are_not_redrawn(self):
+        chart_paths = self.make_report(3).generate_image("Программист", charts_dir=self.charts_dir)
+        modified = [os.stat(chart_path).st_mtime_ns for chart_path in chart_paths]
+        new_chart_paths = self.make_report(4).generate_image("Программист", charts_dir=self.charts_dir)
+        self.assertEqual(len(set(chart_paths)), 4)
+        self.assertEqual([chart_path == new_chart_path for (chart_path, new_chart_path)
+                          in zip(chart_paths, new_chart_paths)], [True, False, True, True])
+        self.assertEqual([os.stat(chart_path).st_mtime_ns for chart_path in chart_paths], modified)
+
+    def test_image_task(self):
+        task = ImageTask(self.make_report(3), "Программист", self.charts_dir, 'png', ("salary_year_levels",))
+        (vacancy_name, chart_paths) = task.process()
+        self.assertEqual(vacancy_name, "Программист")
+        self.assertEqual(len(chart_paths), 1)
+        self.assertTrue(os.path.basename(chart_paths[0]).startswith("salary_year_levels_"))
+        self.assertTrue(os.path.getsize(chart_paths[0]) > 0)
+        modified = os.stat(chart_paths[0]).st_mtime_ns
+        self.assertEqual(task.process(), (vacancy_name, chart_paths))
+        self.assertEqual(os.stat(chart_paths[0]).st_mtime_ns, modified)
+        self.assertEqual(os.listdir(self.charts_dir), [os.path.basename(chart_paths[0])])
+
+    def test_pdf_uses_chart_paths(self):
+        chart_paths = self.make_report(3).generate_image("Программист", charts_dir=self.charts_dir)
+        with mock.patch.object(statistics.pdfkit, 'configuration'), \
+                mock.patch.object(statistics.pdfkit, 'from_string') as from_string:
+            self.make_report(3).generate_pdf("Программист", chart_paths)
+        html = from_string.call_args[0][0]
+        self.assertTrue(all(f"{chart_path}\">" in html for chart_path in chart_paths))
+        self.assertNotIn("graph.png", html)
+
+    def test_render_images_in_pool(self):
+        with ConsumerPool(2) as consumer_pool:
+            chart_paths = render_images({"Программист": self.make_report(3), "Аналитик": self.make_report(4)},
+                                        consumer_pool, self.charts_dir, 'svg')
+        self.assertEqual(sorted(chart_paths), ["Аналитик", "Программист"])
+        self.assertEqual(chart_paths["Программист"][2:], chart_paths["Аналитик"][2:])
+        self.assertEqual(len(os.listdir(self.charts_dir)), 6)
+        self.assertTrue(all(chart_path.endswith('.svg') for chart_path in chart_paths["Аналитик"]))
+
+    def test_city_charts_drawn_in_parent(self):
+        tasks = []
+
+        def record_tasks(image_tasks):
+            tasks.extend(image_tasks)
+            return imap_unordered(tasks)
+
+        with ConsumerPool(2) as consumer_pool:
+            imap_unordered = consumer_pool.imap_unordered
+            with mock.patch.object(consumer_pool, 'imap_unordered', side_effect=record_tasks):
+                chart_paths = render_images({"Программист": self.make_report(3), "Аналитик": self.make_report(4)},
+                                            consumer_pool, self.charts_dir)
+        self.assertEqual([task.chart_names for task in tasks], [("salary_year_levels", "vacancy_year_count")] * 2)
+        self.assertEqual(chart_paths["Программист"][2:], chart_paths["Аналитик"][2:])
+        self.assertTrue(all(os.path.isfile(chart_path) for chart_path in chart_paths["Программист"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,14 +1,24 @@
 import csv
 import re
 import os
+import io
+import mmap
+import codecs
+import heapq
+from sys import intern
 from collections import abc
-from functools import cmp_to_key
+from itertools import chain, islice
+from operator import attrgetter
 from prettytable import PrettyTable
 from prettytable import ALL
+from currency_rates import get_currency_rates
 
 
 def normalize_input_info(input_info):
-    """Нормализует входящую информацию от пользователя.
+    """Нормализует входящую информацию от пользователя. Параметр фильтрации может состоять из нескольких условий
+        «Поле: значение», соединённых через « & » (И) и « | » (ИЛИ); И связывает сильнее. Одно условие
+        нормализуется в пару [поле, значение], несколько - в список групп ИЛИ из списков условий И. Поле None
+        (без фильтрации) допустимо только как единственное условие
 
     Args:
         input_info (list[str | bool | list[str] | list[int]]): Входящая информация от пользователя
@@ -22,12 +32,19 @@ def normalize_input_info(input_info):
         return "Пустой файл"
     if input_info[1] == '':
         input_info[1] = "None: None"
-    temp = input_info[1].find(': ')
-    if temp == -1:
-        return "Формат ввода некорректен"
-    input_info[1] = [input_info[1][:temp], input_info[1][temp + 2:]]
-    if input_info[1][0] not in table_fields:
-        return "Параметр поиска некорректен"
+    tokens = re.split(r' ([&|]) (?=[^:&|]+: )', input_info[1])
+    filtering_parameter = [[]]
+    for (condition, separator) in zip(tokens[::2], tokens[1::2] + ['&']):
+        temp = condition.find(': ')
+        if temp == -1:
+            return "Формат ввода некорректен"
+        if condition[:temp] not in table_fields or (len(tokens) > 1 and condition[:temp] == "None"):
+            return "Параметр поиска некорректен"
+        filtering_parameter[-1].append([condition[:temp], condition[temp + 2:]])
+        if separator == '|':
+            filtering_parameter.append([])
+    input_info[1] = filtering_parameter[0][0] if len(filtering_parameter) == 1 and len(filtering_parameter[0]) == 1 \
+        else filtering_parameter
     if input_info[2] == '':
         input_info[2] = '№'
     elif input_info[2] not in table_fields:
@@ -62,6 +79,9 @@ class Vacancy:
         area_name (str): Название города
         published_at (str): Время публикации вакансии
     """
+    __slots__ = ('name', 'description', 'key_skills', 'experience_id', 'premium', 'employer_name', 'salary',
+                 'area_name', 'published_at')
+
     def __init__(self, name, description, key_skills, experience_id, premium,
                  employer_name, salary, area_name, published_at):
         """Инициализирует объект Vacancy
@@ -96,7 +116,13 @@ class Salary:
         salary_to (str):
         salary_gross (str):
         salary_currency (str):
+        currency_codes (dict[str: str]): Коды валют по их названиям после форматирования
     """
+    currency_codes = {"Манаты": "AZN", "Белорусские рубли": "BYR", "Евро": "EUR", "Грузинский лари": "GEL",
+                      "Киргизский сом": "KGS", "Тенге": "KZT", "Рубли": "RUR", "Гривны": "UAH", "Доллары": "USD",
+                      "Узбекский сум": "UZS"}
+    __slots__ = ('salary_from', 'salary_to', 'salary_gross', 'salary_currency')
+
     def __init__(self, salary_from, salary_to, salary_gross, salary_currency):
         """Инициализирует объект Salary
 
@@ -111,17 +137,22 @@ class Salary:
         self.salary_gross = salary_gross
         self.salary_currency = salary_currency
 
-    def currency_to_rur(self):
-        """Переводит верхнюю и нижнюю вилки оклада в рубли
+    def currency_to_rur(self, published_at=None, currency_rates=None):
+        """Переводит верхнюю и нижнюю вилки оклада в рубли по курсу месяца публикации; если котировки за месяц
+            нет, используется постоянный курс
+
+        Args:
+            published_at (str | None): Время публикации вакансии, None - постоянный курс
+            currency_rates (CurrencyRates | None): Курсы валют, None - общие курсы из vacancies.db
 
         Returns:
             list[int,int]: Верхняя и нижняя вилки оклада в рублях
         """
-        dic_currency_to_rub = {"Манаты": 35.68, "Белорусские рубли": 23.91, "Евро": 59.90, "Грузинский лари": 21.74,
-                               "Киргизский сом": 0.76, "Тенге": 0.13, "Рубли": 1, "Гривны": 1.64, "Доллары": 60.66,
-                               "Узбекский сум": 0.0055}
-        return list(map(lambda x: int(x.replace(' ', '')) * dic_currency_to_rub[self.salary_currency],
-                        (self.salary_from, self.salary_to)))
+        if currency_rates is None:
+            currency_rates = get_currency_rates()
+        rate = currency_rates.get_rate(self.currency_codes.get(self.salary_currency, self.salary_currency),
+                                       published_at[:7] if published_at is not None else None)
+        return list(map(lambda x: int(x.replace(' ', '')) * rate, (self.salary_from, self.salary_to)))
 
 
 class DataSet:
@@ -129,41 +160,98 @@ class DataSet:
 
     Attributes:
         file_name (str): Название csv файла
-        vacancies_objects (list[Vacancy]): Список вакансий полученных из csv файла
+        vacancies_objects (list[Vacancy] | generator): Список вакансий полученных из csv файла
+        attribute_columns (dict[str: list[str]]): Столбцы csv файла, из которых составлен атрибут Vacancy, если они
+            называются не так, как атрибут
     """
-    def __init__(self, file_name):
+    attribute_columns = {"salary": ["salary_from", "salary_to", "salary_gross", "salary_currency"]}
+    _html_tag_pattern = re.compile(r"<[^<>]*>")
+    _space_pattern = re.compile(r"[^\S\n]+")
+
+    def __init__(self, file_name, rows_limit=None, lazy=False, attrs=None):
         """Инициализирует объект DataSet
 
         Args:
             file_name (str | None): Название файла
+            rows_limit (int | None): Сколько первых корректных строк файла прочитать, None - все
+            lazy (bool): Создавать ли вакансии лениво, по мере чтения файла
+            attrs (list[str] | None): Атрибуты Vacancy, ячейки которых нормализуются сразу при чтении, None - все.
+                Остальные остаются как в файле, пока их не нормализует normalize_vacancy
         """
         if (file_name == None):
             return
-        (headers, info) = self._csv_reader(file_name)
-        vacancies = self._create_vacancies(headers, info)
+        (headers, info) = self._csv_reader(file_name, rows_limit)
+        columns = None if attrs is None \
+            else set(chain.from_iterable(self.attribute_columns.get(attr, [attr]) for attr in attrs))
+        vacancies = self._iter_vacancies(headers, info, columns) if lazy \
+            else self._create_vacancies(headers, info, columns)
         self.file_name = file_name
         self.vacancies_objects = vacancies
 
     @staticmethod
-    def _csv_reader(file_name):
-        """Чтение csv файла.
+    def _csv_reader(file_name, rows_limit=None, block_size=1024 * 1024):
+        """Чтение csv файла. Файл отображается в память и разбирается лениво: строки без пустых ячеек отдаются
+            по одной по мере чтения, поэтому файл не загружается в память целиком, а при заданном rows_limit
+            разбирается только до последней нужной строки
 
         Args:
             file_name (str): Название csv файла для чтения
+            rows_limit (int | None): Сколько первых корректных строк отдать, None - все
+            block_size (int): Размер блока файла, который декодируется за раз
 
         Returns:
-            tuple[str, str]: Результат чтения из csv файла в виде пары: лист с названиями столбцов,
-                лист с основными данными
+            tuple[list[str], generator]: Результат чтения из csv файла в виде пары: лист с названиями столбцов,
+                генератор строк с основными данными
         """
-        with open(file_name, encoding="utf-8-sig") as f:
-            reader = [x for x in csv.reader(f)]
-            headers = reader.pop(0)
-            header_len = len(headers)
-            info = list(filter(lambda data: '' not in data and len(data) == header_len, reader))
-        return headers, info
+        def read_blocks():
+            """Чтение отображения файла в память блоками по block_size байт. Каждый блок заканчивается на конце
+                строки, окончания \\r\\n и \\r переводятся в \\n, как при чтении файла в текстовом режиме
+
+            Returns:
+                generator: Блоки файла в виде io.StringIO, по которым можно итерироваться построчно
+            """
+            decoder = codecs.getincrementaldecoder('utf-8-sig')()
+            tail = ''
+            for position in range(0, len(mm), block_size):
+                final = position + block_size >= len(mm)
+                text = tail + decoder.decode(mm[position:position + block_size], final)
+                # \r в самом конце блока может быть началом \r\n, поэтому он остаётся в следующем блоке
+                end = len(text) if final else max(text.rfind('\n'), text.rfind('\r', 0, len(text) - 1)) + 1
+                (text, tail) = (text[:end], text[end:])
+                yield io.StringIO(text, newline=None)
+
+        def read_rows():
+            """Отдача корректных строк файла; файл закрывается, когда строки закончились или генератор удалён
+
+            Returns:
+                generator: Строки csv файла
+            """
+            try:
+                rows_count = 0
+                for row in reader:
+                    if rows_count == rows_limit:
+                        break
+                    if '' in row or len(row) != header_len:
+                        continue
+                    rows_count += 1
+                    yield row
+            finally:
+                mm.close()
+                file.close()
+
+        file = open(file_name, mode='rb')
+        if os.fstat(file.fileno()).st_size == 0:
+            file.close()
+            return [], iter([])
+        mm = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        reader = csv.reader(chain.from_iterable(read_blocks()))
+        headers = next(reader, [])
+        header_len = len(headers)
+        return headers, read_rows()
 
     def _csv_filter(self, info_cell):
-        """Удаление лишних символов из элемента словаря (html-тегов и т.д.)
+        """Удаление лишних символов из элемента словаря (html-тегов и т.д.). Ячейки без тегов и лишних пробельных
+            символов возвращаются как есть, остальные проходят через заранее скомпилированные выражения
 
         Args:
             info_cell (str): Ячейка csv файла
@@ -171,43 +259,116 @@ class DataSet:
         Returns:
             str: Нормализованная ячейка csv файла
         """
-        temp_info = "__temp__".join(info_cell.split("\n"))
-        temp_info = re.sub(r"<[^<>]*>", "", temp_info)
-        temp_info = re.sub(r"\s+", " ", temp_info)
-        return str.strip(temp_info)
+        if '<' not in info_cell and info_cell.isprintable() and '  ' not in info_cell \
+                and info_cell[:1] != ' ' and info_cell[-1:] != ' ':
+            return info_cell
+        if '<' in info_cell:
+            info_cell = self._html_tag_pattern.sub('', info_cell)
+        if '\n' not in info_cell:
+            return ' '.join(info_cell.split())
+        return self._space_pattern.sub(' ', info_cell).strip(' ').replace('\n', '__temp__')
+
+    def normalize_vacancy(self, vacancy, attrs):
+        """Нормализация атрибутов вакансии, которые не были нормализованы при чтении csv файла
 
-    def _create_vacancies(self, headers, info):
+        Args:
+            vacancy (Vacancy): Вакансия, прочитанная с параметром attrs
+            attrs (list[str]): Атрибуты Vacancy, которые нужно нормализовать
+
+        Returns:
+            Vacancy: Та же вакансия с нормализованными атрибутами
+        """
+        for attr in attrs:
+            if attr == "salary":
+                salary = vacancy.salary
+                for salary_attr in ("salary_from", "salary_to", "salary_gross", "salary_currency"):
+                    setattr(salary, salary_attr, self._csv_filter(getattr(salary, salary_attr)))
+            elif attr == "key_skills":
+                vacancy.key_skills = self._csv_filter('\n'.join(vacancy.key_skills)).split('__temp__')
+            else:
+                setattr(vacancy, attr, self._csv_filter(getattr(vacancy, attr)))
+        return vacancy
+
+    def _create_vacancies(self, headers, info, columns=None):
         """Преобразование прочитанных данных из csv файла в список вакансий, в котором каждой вакансии соответствует
             одна строка из csv файла
 
         Args:
             headers (list[str]): Названия столбцов csv файла
             info (list[list[str]]): Основные данные csv файла
+            columns (set[str] | None): Столбцы, ячейки которых нужно нормализовать, None - все
 
         Returns:
             list[Vacancy]: Список строк в виде словарей
         """
-        vacancies = []
+        return list(self._iter_vacancies(headers, info, columns))
+
+    def _iter_vacancies(self, headers, info, columns=None):
+        """Ленивое преобразование прочитанных данных из csv файла в вакансии. Ячейки столбцов не из columns
+            остаются в том виде, в котором прочитаны, а навыки тогда не разбиваются на отдельные
+
+        Args:
+            headers (list[str]): Названия столбцов csv файла
+            info (iterable[list[str]]): Основные данные csv файла
+            columns (set[str] | None): Столбцы, ячейки которых нужно нормализовать, None - все
+
+        Returns:
+            generator: Вакансии в порядке строк файла
+        """
+        csv_filter = self._csv_filter
+        filtered_indexes = [index for (index, header) in enumerate(headers) if columns is None or header in columns]
         for info_row in info:
-            info_list = list(map(lambda x: self._csv_filter(info_row[x]), range(len(headers))))
-            salary = Salary(info_list[6], info_list[7], info_list[8], info_list[9])
+            info_list = info_row[:]
+            for index in filtered_indexes:
+                info_list[index] = csv_filter(info_list[index])
+            salary = Salary(info_list[6], info_list[7], info_list[8], intern(info_list[9]))
             key_skills = info_list[2].split('__temp__')
-            vacancy = Vacancy(info_list[0], info_list[1], key_skills, info_list[3], info_list[4],
-                              info_list[5], salary, info_list[10], info_list[11])
-            vacancies.append(vacancy)
-        return vacancies
+            yield Vacancy(info_list[0], info_list[1], key_skills, info_list[3], info_list[4],
+                          info_list[5], salary, intern(info_list[10]), info_list[11])
 
 
 class InputConnect:
+    """Класс для работы над списком Vacancy: форматирование, фильтрация, сортировка и печать
+
+    Attributes:
+        field_attributes (dict[str: list[str]]): Атрибуты Vacancy, которые нужны для фильтрации или сортировки
+            по столбцу таблицы
+    """
+    field_attributes = {"Название": ["name"], "Описание": ["description"], "Навыки": ["key_skills"],
+                        "Опыт работы": ["experience_id"], "Премиум-вакансия": ["premium"],
+                        "Компания": ["employer_name"], "Оклад": ["salary"], "Название региона": ["area_name"],
+                        "Дата публикации вакансии": ["published_at"], "Идентификатор валюты оклада": ["salary"],
+                        "None": [], "№": []}
+
     @staticmethod
-    def info_formatter(vacancies):
+    def info_formatter(vacancies, attrs=None, lazy=False):
         """Нормализация данных в вакансиях
 
         Args:
-            vacancies (list[Vacancy] | Vacancy): Список вакансий
+            vacancies (list[Vacancy] | iterable[Vacancy]): Список вакансий
+            attrs (list[str] | None): Атрибуты, которые нужно отформатировать, None - все
+            lazy (bool): Форматировать ли вакансии лениво, по мере получения
 
         Returns:
-            list[Vacancy] | Vacancy: Результат форматирования
+            list[Vacancy] | iterable[Vacancy]: Результат форматирования
+        """
+        format_vacancy = InputConnect.compile_formatter(attrs)
+        if lazy:
+            return map(format_vacancy, vacancies)
+        for vacancy in vacancies:
+            format_vacancy(vacancy)
+        return vacancies
+
+    @staticmethod
+    def compile_formatter(attrs=None):
+        """Построение функции форматирования вакансии. План форматирования - пары из атрибута и его форматтера -
+            составляется один раз, поэтому для каждой вакансии не нужно искать её атрибуты
+
+        Args:
+            attrs (list[str] | None): Атрибуты, которые нужно отформатировать, None - все
+
+        Returns:
+            function: Функция, форматирующая вакансию на месте и возвращающая её
         """
         def formatter_string_number(str_num):
             """Устранение дробных разделителей в строковом числе
@@ -312,88 +473,147 @@ class InputConnect:
                     "name": formatter_standard_field_value, "description": formatter_standard_field_value,
                     "employer_name": formatter_standard_field_value, "area_name": formatter_standard_field_value}
 
-        for vacancy in vacancies:
-            attrs = [a for a in dir(vacancy) if not a.startswith('__') and not callable(getattr(vacancy, a))]
-            for attr in attrs:
-                setattr(vacancy, attr, dic_func[attr](getattr(vacancy, attr)))
-        return vacancies
+        format_plan = [(attr, attrgetter(attr), dic_func[attr])
+                       for attr in (Vacancy.__slots__ if attrs is None else attrs)]
+
+        def format_vacancy(vacancy):
+            """Форматирование атрибутов одной вакансии по плану
+
+            Args:
+                vacancy (Vacancy): Вакансия
+
+            Returns:
+                Vacancy: Та же вакансия после форматирования
+            """
+            for (attr, get_value, formatter) in format_plan:
+                setattr(vacancy, attr, formatter(get_value(vacancy)))
+            return vacancy
+
+        return format_vacancy
 
     @staticmethod
-    def info_filter(vacancies, filtering_parameter):
+    def info_filter(vacancies, filtering_parameter, lazy=False):
         """Фильтрация списка вакансий, соответствующих строкам csv файла
 
         Args:
-            vacancies (list[Vacancy] | Vacancy): Список вакансий для фильтрации
-            filtering_parameter (list[str,str]): Параметр фильтрации
+            vacancies (list[Vacancy] | iterable[Vacancy]): Список вакансий для фильтрации
+            filtering_parameter (list[str, str] | list[list[list[str, str]]]): Параметр фильтрации: одно условие
+                или группы ИЛИ из условий И
+            lazy (bool): Фильтровать ли вакансии лениво, по мере получения
 
         Returns:
-            list[Vacancy] | Vacancy: Результат фильтрации
+            list[Vacancy] | iterable[Vacancy]: Результат фильтрации
         """
-        def filter_verbatim(vacancy, field_should):
+        filtered = filter(InputConnect.compile_filter(filtering_parameter), vacancies)
+        return filtered if lazy else list(filtered)
+
+    @staticmethod
+    def get_filter_conditions(filtering_parameter):
+        """Приведение параметра фильтрации к группам ИЛИ из условий И
+
+        Args:
+            filtering_parameter (list[str, str] | list[list[list[str, str]]]): Параметр фильтрации
+
+        Returns:
+            list[list[list[str, str]]]: Группы ИЛИ из условий И
+        """
+        return [[filtering_parameter]] if isinstance(filtering_parameter[0], str) else filtering_parameter
+
+    @staticmethod
+    def compile_filter(filtering_parameter):
+        """Построение функции проверки вакансии по параметру фильтрации. Значения условий разбираются один раз,
+            при построении, а не для каждой вакансии
+
+        Args:
+            filtering_parameter (list[str, str] | list[list[list[str, str]]]): Параметр фильтрации: одно условие
+                или группы ИЛИ из условий И
+
+        Returns:
+            function: Функция, принимающая вакансию и возвращающая, подходит ли она
+        """
+        def filter_verbatim(field, value_should):
             """Лексикографическое сравнивание значения из объекта вакансии с требуемым значением
 
             Args:
-                vacancy (Vacancy): Объекта вакансии
-                field_should (tuple[str, str]): Аттрибут объекта вакансии и требуемым значением
+                field (str): Название столбца
+                value_should (str): Требуемое значение
 
             Returns:
-                bool: Результат сравнения
+                function: Функция сравнения
             """
-            return getattr(vacancy, dic_naming[field_should[0]]) == field_should[1]
+            get_value = attrgetter(dic_naming[field])
+            return lambda vacancy: get_value(vacancy) == value_should
 
-        def filter_key_skills(vacancy, field_should):
+        def filter_key_skills(field, value_should):
             """Cравнение значения скиллов из объекта вакансии с требуемым значением
 
             Args:
-                vacancy (Vacancy): Объекта вакансии
-                field_should (tuple[str, str]): Аттрибут объекта вакансии и требуемым значением
+                field (str): Название столбца
+                value_should (str): Требуемые навыки через запятую
 
             Returns:
-                bool: Результат сравнения
+                function: Функция сравнения
             """
-            values_should = field_should[1].split(', ')
-            key_skills = vacancy.key_skills[vacancy.key_skills.find('#') + 1:]\
-                .replace(', ', '\n').replace('...', '\n').split('\n')
-            return all(list(map(lambda value_should: value_should in key_skills, values_should)))
+            values_should = set(value_should.split(', '))
+
+            def check(vacancy):
+                key_skills = vacancy.key_skills
+                return values_should.issubset(key_skills[key_skills.find('#') + 1:]
+                                              .replace(', ', '\n').replace('...', '\n').split('\n'))
+            return check
 
-        def filter_salary(vacancy, field_should):
+        def filter_salary(field, value_should):
             """Сравнение значения оклада из объекта вакансии с требуемым значением
 
             Args:
-                vacancy (Vacancy): Объекта вакансии
-                field_should (tuple[str, str]): Аттрибут объекта вакансии и требуемым значением
+                field (str): Название столбца
+                value_should (str): Требуемый оклад
 
             Returns:
-                bool: Результат сравнения
+                function: Функция сравнения
             """
-            salary = vacancy.salary
-            return int(salary.salary_from.replace(' ', '')) <= int(field_should[1]) <= int(salary.salary_to
-                                                                                           .replace(' ', ''))
+            salary_should = int(value_should)
+
+            def check(vacancy):
+                salary = vacancy.salary
+                return int(salary.salary_from.replace(' ', '')) <= salary_should \
+                    <= int(salary.salary_to.replace(' ', ''))
+            return check
 
-        def filter_salary_currency(vacancy, field_should):
+        def filter_salary_currency(field, value_should):
             """Сравнение значения валюты оклада из объекта вакансии с требуемым значением
 
             Args:
-                vacancy (Vacancy): Объекта вакансии
-                field_should (tuple[str, str]): Аттрибут объекта вакансии и требуемым значением
+                field (str): Название столбца
+                value_should (str): Требуемая валюта
 
             Returns:
-                bool: Результат сравнения
+                function: Функция сравнения
             """
-            return vacancy.salary.salary_currency == field_should[1]
+            return lambda vacancy: vacancy.salary.salary_currency == value_should
 
-        def filter_published_at(vacancy, field_should):
+        def filter_published_at(field, value_should):
             """Сравнение значения времени публикации из объекта вакансии с требуемым значением
 
             Args:
-                vacancy (Vacancy): Объекта вакансии
-                field_should (tuple[str, str]): Аттрибут объекта вакансии и требуемым значением
+                field (str): Название столбца
+                value_should (str): Требуемая дата
+
+            Returns:
+                function: Функция сравнения
+            """
+            return lambda vacancy: vacancy.published_at.partition('#')[2] == value_should
+
+        def combine_all(checks):
+            """Объединение функций проверки через И
+
+            Args:
+                checks (list[function]): Функции проверки
 
             Returns:
-                bool: Результат сравнения
+                function: Функция проверки
             """
-            value = vacancy.published_at
-            return value[value.find('#') + 1:] == field_should[1]
+            return checks[0] if len(checks) == 1 else lambda vacancy: all(check(vacancy) for check in checks)
 
         dic_naming = {"Название": "name", "Описание": "description", "Опыт работы": "experience_id",
                       "Премиум-вакансия": "premium", "Компания": "employer_name", "Название региона": "area_name"}
@@ -402,112 +622,111 @@ class InputConnect:
                       "Оклад": filter_salary, "Дата публикации вакансии": filter_published_at,
                       "Идентификатор валюты оклада": filter_salary_currency, "Название региона": filter_verbatim}
 
-        return list(filter(lambda vacancy: filtering_parameter[0] == "None"
-                                    or dic_filter[filtering_parameter[0]](vacancy, filtering_parameter), vacancies))
+        if filtering_parameter[0] == "None":
+            return lambda vacancy: True
+        groups = [combine_all([dic_filter[field](field, value_should) for (field, value_should) in group])
+                  for group in InputConnect.get_filter_conditions(filtering_parameter)]
+        return groups[0] if len(groups) == 1 else lambda vacancy: any(group(vacancy) for group in groups)
 
     @staticmethod
-    def info_sorter(vacancies, sort_field, reverse_sort):
-        """Сортировка списка вакансий, представляющих собой строки файла csv формата
+    def info_sorter(vacancies, sort_field, reverse_sort, limit=None):
+        """Сортировка списка вакансий, представляющих собой строки файла csv формата. Ключ сортировки вычисляется
+            один раз для каждой вакансии, а при нескольких параметрах сортировки вакансии упорядочиваются по первому,
+            затем по второму и т.д. Равные вакансии сохраняют исходный порядок. Если задан limit, через кучу
+            отбираются только первые limit вакансий, и сортировать можно любой итерируемый объект
 
         Args:
-            vacancies (list[Vacancy]): Данные для сортировки
-            sort_field (str): Параметр сортировки
+            vacancies (list[Vacancy] | iterable[Vacancy]): Данные для сортировки
+            sort_field (str | list[str]): Параметр сортировки или список параметров по убыванию важности
             reverse_sort (bool): Сортировать ли в обратном порядке
+            limit (int | None): Сколько первых вакансий вернуть, None - все
 
         Returns:
             list[Vacancy]: Результат сортировки
         """
-        def lexicographic_sorter(vacancy1, vacancy2):
-            """Лексикографическое сравнение одного объекта вакансии с другим по параметру сортировки
+        sort_key = InputConnect.get_sort_key(sort_field)
+        if limit is not None:
+            return (heapq.nlargest if reverse_sort else heapq.nsmallest)(limit, vacancies, key=sort_key)
+        vacancies.sort(key=sort_key, reverse=reverse_sort)
 
-            Args:
-                vacancy1 (Vacancy): Первый объект вакансии для сравнения
-                vacancy2 (Vacancy): Первый объект вакансии для сравнения
+        return vacancies
 
-            Returns:
-                int: Результат сравнения
-            """
-            return 1 if getattr(vacancy1, dic_naming[sort_field]) >= getattr(vacancy2, dic_naming[sort_field]) else -1
+    @staticmethod
+    def get_sort_key(sort_field):
+        """Построение функции, вычисляющей ключ сортировки вакансии
 
-        def key_skills_sorter(vacancy1, vacancy2):
-            """Сравнение одного объекта вакансии с другим по количеству навыков
+        Args:
+            sort_field (str | list[str]): Параметр сортировки или список параметров по убыванию важности
+
+        Returns:
+            function: Функция, принимающая вакансию и возвращающая её ключ сортировки
+        """
+        def key_skills_key(vacancy):
+            """Ключ сортировки по количеству навыков
 
             Args:
-                vacancy1 (Vacancy): Первый объект вакансии для сравнения
-                vacancy2 (Vacancy): Первый объект вакансии для сравнения
+                vacancy (Vacancy): Объект вакансии
 
             Returns:
-                int: Результат сравнения
+                int: Количество навыков
             """
-            (vacancy1_count, vacancy2_count) = list(map(
-                lambda vacancy: int(vacancy.key_skills[:vacancy.key_skills.find('#')]), (vacancy1, vacancy2)))
-            return vacancy1_count - vacancy2_count
+            return int(vacancy.key_skills[:vacancy.key_skills.find('#')])
 
-        def experience_sorter(vacancy1, vacancy2):
-            """Сравнение одного объекта вакансии с другим по количеству требуемых лет опыта
+        def experience_key(vacancy):
+            """Ключ сортировки по количеству требуемых лет опыта - первому числу в строке опыта
 
             Args:
-                vacancy1 (Vacancy): Первый объект вакансии для сравнения
-                vacancy2 (Vacancy): Первый объект вакансии для сравнения
+                vacancy (Vacancy): Объект вакансии
 
             Returns:
-                int: Результат сравнения
+                int: Первое число в строке или 0, если чисел нет
             """
-            def find_first_num(row_value):
-                """Получение первого числа в строке
-
-                Args:
-                    row_value (str): Строка для поиска
-
-                Returns:
-                    int: Результат поиска числа
-                """
-                row_num = list(filter(lambda char: char.isdigit(), row_value))
-                return int(row_num[0]) if len(row_num) > 0 else 0
-
-            (row1_num, row2_num) = list(map(
-                lambda vacancy: find_first_num(vacancy.experience_id), (vacancy1, vacancy2)))
-            return row1_num - row2_num
+            return next((int(char) for char in vacancy.experience_id if char.isdigit()), 0)
 
-        def salary_sorter(vacancy1, vacancy2):
-            """Сравнение одного объекта вакансии с другим по окладу
+        def salary_key(vacancy):
+            """Ключ сортировки по среднему окладу в рублях по курсу месяца публикации
 
             Args:
-                vacancy1 (Vacancy): Первый объект вакансии для сравнения
-                vacancy2 (Vacancy): Первый объект вакансии для сравнения
+                vacancy (Vacancy): Объект вакансии
 
             Returns:
-                int: Результат сравнения
+                float: Средний оклад в рублях
             """
-            (vacancy1_salary, vacancy2_salary) = list(map(
-                lambda vacancy: sum(vacancy.salary.currency_to_rur()) / 2, (vacancy1, vacancy2)))
-            return vacancy1_salary - vacancy2_salary
+            return sum(vacancy.salary.currency_to_rur(vacancy.published_at, currency_rates)) / 2
 
-        dic_naming = {"Название": "name", "Описание": "description", "Дата публикации вакансии": "published_at",
-                      "Премиум-вакансия": "premium", "Компания": "employer_name", "Название региона": "area_name"}
-        dic_sorter = {"Название": lexicographic_sorter, "Описание": lexicographic_sorter, "Навыки": key_skills_sorter,
-                      "Опыт работы": experience_sorter, "Премиум-вакансия": lexicographic_sorter,
-                      "Компания": lexicographic_sorter, "Оклад": salary_sorter, "Название региона": lexicographic_sorter,
-                      "Дата публикации вакансии": lexicographic_sorter}
+        currency_rates = get_currency_rates()
 
-        vacancies.sort(key=cmp_to_key(dic_sorter[sort_field]), reverse=reverse_sort)
+        dic_key = {"Название": attrgetter("name"), "Описание": attrgetter("description"), "Навыки": key_skills_key,
+                   "Опыт работы": experience_key, "Премиум-вакансия": attrgetter("premium"),
+                   "Компания": attrgetter("employer_name"), "Оклад": salary_key,
+                   "Название региона": attrgetter("area_name"),
+                   "Дата публикации вакансии": attrgetter("published_at")}
 
-        return vacancies
+        if isinstance(sort_field, str):
+            return dic_key[sort_field]
+        keys = [dic_key[field] for field in sort_field]
+        return lambda vacancy: tuple(key(vacancy) for key in keys)
 
     @staticmethod
-    def print_vacancies(vacancies, start_end_nums, table_fields):
-        """Печать талицы с вакансиями
+    def print_vacancies(vacancies, start_end_nums, table_fields, format_attrs=None):
+        """Печать талицы с вакансиями. В таблицу добавляются только вакансии из диапазона вывода, поэтому
+            вакансии после него не читаются, а format_attrs форматируются только у выводимых вакансий
 
         Args:
-            vacancies (list[Vacancy]): Список вакансий, соответствующих строкам файла csv формата
+            vacancies (list[Vacancy] | iterable[Vacancy]): Список вакансий, соответствующих строкам файла csv формата
             start_end_nums (list[int, int]): От и до какого номера включать вакансии в таблицу
             table_fields (list[str]): Название столбцов для вывода в таблицу
+            format_attrs (list[str] | None): Атрибуты, которые нужно отформатировать перед выводом
         """
         dic_naming = {"name": "Название", "description": "Описание", "key_skills": "Навыки",
                       "experience_id": "Опыт работы", "premium": "Премиум-вакансия", "employer_name": "Компания",
                       "salary": "Оклад", "area_name": "Название региона", "published_at": "Дата публикации вакансии"}
-        info_table = PrettyTable(list(map(lambda key: dic_naming[key], dic_naming.keys())))
-        for vacancy in vacancies:
+        info_table = PrettyTable(['№'] + list(map(lambda key: dic_naming[key], dic_naming.keys())))
+        format_vacancy = InputConnect.compile_formatter(format_attrs) if format_attrs is not None else None
+        for (number, vacancy) in enumerate(islice(vacancies, start_end_nums[0], start_end_nums[1]),
+                                           start_end_nums[0] + 1):
+            if format_vacancy is not None:
+                format_vacancy(vacancy)
             values = list(map(lambda attr: getattr(vacancy, attr), dic_naming.keys()))
             skills = values.pop(2)
             values.insert(2, skills[skills.find('#') + 1:])
@@ -516,12 +735,11 @@ class InputConnect:
                              f" ({salary.salary_currency}) ({salary.salary_gross})")
             date = values.pop(8)
             values.insert(8, date[date.find('#') + 1:])
-            info_table.add_row(values)
-        info_table.add_autoindex('№')
+            info_table.add_row([number] + values)
         info_table.hrules = ALL
         info_table.align = 'l'
         info_table.max_width = 20
-        print(info_table.get_string(start=start_end_nums[0], end=start_end_nums[1], fields=table_fields))
+        print(info_table.get_string(fields=table_fields))
 
 
 ######################################################################################################################
@@ -540,15 +758,25 @@ def get_vacancies():
     normalize_result = normalize_input_info(input_info)
     if normalize_result != "Нормализация прошла успешно":
         return normalize_result
-    data_set = DataSet(input_info[0])
+    rows_limit = input_info[4][1] if input_info[1][0] == "None" and input_info[2] == '№' else None
+    input_connect = InputConnect()
+    filter_fields = [field for group in input_connect.get_filter_conditions(input_info[1]) for (field, _) in group]
+    key_attrs = list(dict.fromkeys(chain.from_iterable(input_connect.field_attributes[field]
+                                                       for field in filter_fields + [input_info[2]])))
+    data_set = DataSet(input_info[0], rows_limit, lazy=True, attrs=key_attrs)
     vacancies = data_set.vacancies_objects
-    if len(vacancies) == 0:
+    first_vacancy = next(vacancies, None)
+    if first_vacancy is None:
         return "Нет данных"
-    input_connect = InputConnect()
-    formatted_info = input_connect.info_formatter(vacancies)
-    filtered_info = input_connect.info_filter(formatted_info, input_info[1])
-    if len(filtered_info) == 0:
+    formatted_info = input_connect.info_formatter(chain([first_vacancy], vacancies), key_attrs, lazy=True)
+    filtered_info = input_connect.info_filter(formatted_info, input_info[1], lazy=True)
+    first_vacancy = next(filtered_info, None)
+    if first_vacancy is None:
         return "Ничего не найдено"
+    filtered_info = chain([first_vacancy], filtered_info)
     if input_info[2] != '№':
-        filtered_info = input_connect.info_sorter(filtered_info, input_info[2], input_info[3])
-    input_connect.print_vacancies(filtered_info, input_info[4], input_info[5])
+        filtered_info = input_connect.info_sorter(filtered_info, input_info[2], input_info[3], limit=input_info[4][1])
+    other_attrs = [attr for attr in dict.fromkeys(chain.from_iterable(input_connect.field_attributes.values()))
+                   if attr not in key_attrs]
+    filtered_info = map(lambda vacancy: data_set.normalize_vacancy(vacancy, other_attrs), filtered_info)
+    input_connect.print_vacancies(filtered_info, input_info[4], input_info[5], other_attrs)
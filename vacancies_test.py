@@ -1,5 +1,8 @@
+import os
+import tempfile
 import unittest
 from vacancies import normalize_input_info, DataSet, InputConnect, Vacancy, Salary
+from currency_rates import CurrencyRates
 
 
 class NormalizeInputTests(unittest.TestCase):
@@ -28,6 +31,78 @@ class NormalizeInputTests(unittest.TestCase):
                                               "Название, Опыт, Оклад, Компания, Название региона"]),
                                               "Порядок сортировки задан некорректно")
 
+class CompoundFilterInputTests(unittest.TestCase):
+    def setUp(self):
+        (handle, self.file_name) = tempfile.mkstemp(suffix='.csv')
+        with os.fdopen(handle, mode='w') as file:
+            file.write('name\n')
+
+    def tearDown(self):
+        os.remove(self.file_name)
+
+    def test_compound_filter_input(self):
+        input_info = [self.file_name, "Название региона: Москва & Опыт работы: Нет опыта | Компания: A & B", "", "", "",
+                      ""]
+        self.assertEqual(normalize_input_info(input_info), "Нормализация прошла успешно")
+        self.assertEqual(input_info[1], [[["Название региона", "Москва"], ["Опыт работы", "Нет опыта"]],
+                                         [["Компания", "A & B"]]])
+
+    def test_wrong_compound_filter_input(self):
+        self.assertEqual(normalize_input_info([self.file_name, "Оклад: 50000 & Новизна: 1", "", "", "", ""]),
+                         "Параметр поиска некорректен")
+
+    def test_none_in_compound_filter_input(self):
+        self.assertEqual(normalize_input_info([self.file_name, "Оклад: 50000 & None: None", "", "", "", ""]),
+                         "Параметр поиска некорректен")
+        self.assertEqual(normalize_input_info([self.file_name, "None: x | Компания: A", "", "", "", ""]),
+                         "Параметр поиска некорректен")
+
+class CsvReaderTests(unittest.TestCase):
+    def setUp(self):
+        (handle, self.file_name) = tempfile.mkstemp(suffix='.csv')
+        os.close(handle)
+        self.write_file('\r\n')
+
+    def tearDown(self):
+        os.remove(self.file_name)
+
+    def write_file(self, newline):
+        with open(self.file_name, mode='wb') as file:
+            file.write(('\ufeffname,key_skills,area_name\r\n'
+                        'проф1,"скил1\r\nскил2",Москва\r\n'
+                        'проф2,,Пермь\r\n'
+                        'проф3,скил3,Казань,лишнее\r\n'
+                        'проф4,скил4,Тула\r\n'
+                        'проф5,скил5,Омск\r\n').replace('\r\n', newline).encode('utf-8'))
+
+    def check_newline(self, newline):
+        self.write_file(newline)
+        for block_size in (1024 * 1024, 7, 1):
+            (headers, info) = DataSet._csv_reader(self.file_name, block_size=block_size)
+            self.assertEqual(headers, ["name", "key_skills", "area_name"])
+            self.assertEqual(list(info), [["проф1", "скил1\nскил2", "Москва"], ["проф4", "скил4", "Тула"],
+                                          ["проф5", "скил5", "Омск"]])
+
+    def test_crlf_rows(self):
+        self.check_newline('\r\n')
+
+    def test_cr_rows(self):
+        self.check_newline('\r')
+
+    def test_lf_rows(self):
+        self.check_newline('\n')
+
+    def test_valid_rows(self):
+        (headers, info) = DataSet._csv_reader(self.file_name)
+        self.assertEqual(headers, ["name", "key_skills", "area_name"])
+        self.assertEqual(list(info), [["проф1", "скил1\nскил2", "Москва"], ["проф4", "скил4", "Тула"],
+                                      ["проф5", "скил5", "Омск"]])
+
+    def test_rows_limit(self):
+        (headers, info) = DataSet._csv_reader(self.file_name, 2)
+        self.assertEqual(list(info), [["проф1", "скил1\nскил2", "Москва"], ["проф4", "скил4", "Тула"]])
+
+
 class CsvFilterTests(unittest.TestCase):
     dataSet = DataSet(None)
     def test_filter_empty_1(self):
@@ -63,6 +138,19 @@ class CsvFilterTests(unittest.TestCase):
         self.assertEqual(self.dataSet._csv_filter("XML\nSQL\nAtlassian Jira\nSOAP\nREST\nXsd\nJSON\nAPI"),
             "XML__temp__SQL__temp__Atlassian Jira__temp__SOAP__temp__REST__temp__Xsd__temp__JSON__temp__API")
 
+    def test_filter_tags_around_spaces(self):
+        self.assertEqual(self.dataSet._csv_filter(" <b> <i>Java</i>\t</b>\n <p>SQL</p> "), "Java __temp__ SQL")
+
+    def test_filter_clean_cell(self):
+        self.assertEqual(self.dataSet._csv_filter("Санкт-Петербург"), "Санкт-Петербург")
+
+    def test_normalize_vacancy(self):
+        vacancy = Vacancy("проф1", "<p>опис1</p>", ["скил1\nскил2"], None, None, None,
+                          Salary(" 200", "300 ", "False", "EUR"), None, None)
+        self.dataSet.normalize_vacancy(vacancy, ["description", "key_skills", "salary"])
+        self.assertEqual((vacancy.description, vacancy.key_skills, vacancy.salary.salary_from,
+                          vacancy.salary.salary_to), ("опис1", ["скил1", "скил2"], "200", "300"))
+
 
 class CreatingVacancyListTest(unittest.TestCase):
     dataSet = DataSet(None)
@@ -153,6 +241,14 @@ class InfoFormatterTests(unittest.TestCase):
         self.assertEqual(formatted_vac.description, "Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed "
             "do eiusmod tempor incididunt ut labore ...")
 
+    def test_lazy_selected_attrs(self):
+        vacancies = (Vacancy("name", "description", None, "noExperience", "True", None, None, None, None)
+                     for _ in range(2))
+        formatted = list(InputConnect.info_formatter(vacancies, ["experience_id", "premium"], lazy=True))
+        self.assertEqual([(vac.description, vac.experience_id, vac.premium) for vac in formatted],
+                         [("description", "Нет опыта", "Да")] * 2)
+
+
 class InfoFilterTests(unittest.TestCase):
     inputConnect = InputConnect()
     def test_experience_filter(self):
@@ -210,6 +306,27 @@ class InfoFilterTests(unittest.TestCase):
                                                       ["Навыки", "Git"])
         self.assertEqual(filt_vac_list, [vac_2, vac_3, vac_4])
 
+    def test_compound_filter(self):
+        vac_1 = Vacancy(None, None, None, "Нет опыта", None, None, None, "Москва", None)
+        vac_2 = Vacancy(None, None, None, "Более 6 лет", None, None, None, "Москва", None)
+        vac_3 = Vacancy(None, None, None, "Нет опыта", None, None, None, "Тюмень", None)
+        vac_4 = Vacancy(None, None, None, "Более 6 лет", None, None, None, "Подольск", None)
+        filt_vac_list = self.inputConnect.info_filter([vac_1, vac_2, vac_3, vac_4],
+                                                      [[["Название региона", "Москва"], ["Опыт работы", "Нет опыта"]],
+                                                       [["Название региона", "Подольск"]]])
+        self.assertEqual(filt_vac_list, [vac_1, vac_4])
+
+class SalaryTests(unittest.TestCase):
+    currency_rates = CurrencyRates({"2003-01": {"USD": 30.0, "EUR": None}})
+
+    def test_month_rate(self):
+        self.assertEqual(Salary("1000", "2 000", "False", "Доллары")
+                         .currency_to_rur("2003-01-10T10:00:00+0300", self.currency_rates), [30000.0, 60000.0])
+
+    def test_fallback_rate(self):
+        self.assertEqual(Salary("1000", "2000", "False", "EUR")
+                         .currency_to_rur("2003-01-10T10:00:00+0300", self.currency_rates), [59900.0, 119800.0])
+
 class InfoSorterTests(unittest.TestCase):
     inputConnect = InputConnect()
     def test_key_skills_sort(self):
@@ -269,6 +386,23 @@ class InfoSorterTests(unittest.TestCase):
                                                       "Название", False)
         self.assertEqual(sort_vac_list, [vac_5, vac_3, vac_6, vac_4, vac_1, vac_7, vac_2, vac_8])
 
+    def test_limited_sort_matches_full_sort(self):
+        vacancies = [Vacancy(name, None, None, None, None, None, None, None, None)
+                     for name in ["Кадровик", "Аналитик", "Кадровик", "Аналитик", "Верстальщик", "Аналитик"]]
+        for reverse_sort in (False, True):
+            self.assertEqual(self.inputConnect.info_sorter(iter(vacancies), "Название", reverse_sort, limit=4),
+                             self.inputConnect.info_sorter(list(vacancies), "Название", reverse_sort)[:4])
+
+    def test_multi_field_sort(self):
+        vac_1 = Vacancy("Кадровик", None, None, "Более 6 лет", None, None, None, None, None)
+        vac_2 = Vacancy("Аналитик", None, None, "От 1 до 3 лет", None, None, None, None, None)
+        vac_3 = Vacancy("Аналитик", None, None, "Без опыта", None, None, None, None, None)
+        vac_4 = Vacancy("Кадровик", None, None, "Без опыта", None, None, None, None, None)
+        vac_5 = Vacancy("Аналитик", None, None, "Без опыта", None, None, None, None, None)
+        sort_vac_list = self.inputConnect.info_sorter([vac_1, vac_2, vac_3, vac_4, vac_5],
+                                                      ["Название", "Опыт работы"], False)
+        self.assertEqual(sort_vac_list, [vac_3, vac_5, vac_2, vac_4, vac_1])
+
 
 if __name__ == "__main__":
     unittest.main()